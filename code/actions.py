@@ -13,9 +13,17 @@ if TYPE_CHECKING:
     from magic import AttackSpell
 
 class Action:
+    # Time a normal speed actor waits after this action before it acts again. A full turn is 100.
+    base_cost = 100
+    
     def __init__(self, sprite: Actor) -> None:
         self.sprite = sprite
         
+    @property
+    def cost(self) -> int:
+        """ Time until the actor may act again, `base_cost` scaled by the actor's speed. """
+        return self.base_cost * 100 // getattr(self.sprite.entity, 'speed', 100)
+        
     @property
     def engine(self) -> Engine:
         """ Return the engine this action belongs to. """
@@ -37,6 +45,7 @@ class Action:
     
 class PickupAction(Action):
     """ Pickup an item and add it to the inventory. """
+    base_cost = 50
     
     def __init__(self, sprite: Actor):
         super().__init__(sprite)
@@ -44,11 +53,11 @@ class PickupAction(Action):
     def perform(self) -> None:
         actor_location_x, actor_location_y = self.sprite.x, self.sprite.y
         
-        items_at_loc: list[Sprite] = []
-        
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
-                items_at_loc.append(item)
+        from entity import Item
+        items_at_loc: list[Sprite] = [
+            sprite for sprite in self.engine.game_map.get_sprites_at_location(actor_location_x, actor_location_y)
+            if isinstance(sprite.entity, Item)
+        ]
                 
         if not items_at_loc:
             raise exceptions.Impossible("There is nothing here to pick up.")
@@ -60,12 +69,14 @@ class PickupAction(Action):
 
         result = self.sprite.entity.add_inventory(items_at_loc[0].entity, True)
         if not result:
-            self.engine.game_map.sprites.remove(items_at_loc[0])
+            self.engine.game_map.remove_sprite(items_at_loc[0])
             self.engine.message_log.add_message(f'{self.sprite.name.capitalize()} picked up {items_at_loc[0].name}.')
             return
         self.engine.message_log.add_message(result.args[0], color.impossible)
 
 class DropItem(Action):
+    base_cost = 50
+    
     def __init__(self, sprite: Actor, item: Item | List[Item]):
         super().__init__(sprite)
         if not isinstance(item, List):
@@ -111,6 +122,7 @@ class EatAction(EffectAction):
                 self.sprite.entity.tags.add('cannibal')
             if self.effect.parent.dead_character.INT > 7:
                 self.sprite.entity.tags.add('sophant eater')
+            self.sprite.entity.invalidate_fingerprint()
         
         self.effect.eat(self)
         
@@ -211,14 +223,10 @@ class InteractAction(Action):
         interactable_sprites_around_player: dict[tuple[int, int], Sprite] = {}
         
         surrounding_points = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
-        for sprite in self.engine.game_map.sprites - {self.engine.player}:
-            if not sprite.entity.interactable:
-                continue
-            
-            for point in surrounding_points:
-                if sprite.x == self.engine.player.x + point[0] and sprite.y == self.engine.player.y + point[1]:
+        for point in surrounding_points:
+            for sprite in self.engine.game_map.get_sprites_at_location(self.engine.player.x + point[0], self.engine.player.y + point[1]):
+                if sprite is not self.engine.player and sprite.entity.interactable:
                     interactable_sprites_around_player[point] = sprite
-                    break
         
         if not interactable_sprites_around_player:
             raise exceptions.Impossible('Nothing to interact with.')
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from collections import Counter
 from typing import List, Tuple, TYPE_CHECKING, Optional
 
 import numpy as np
@@ -6,34 +7,80 @@ import tcod, random
 
 from actions import Action, MeleeAction, MovementAction, WaitAction, BumpAction
 
-from tcod.map import compute_fov
-
 from sprite import Actor
 
 if TYPE_CHECKING:
     from sprite import Actor
+    from world import GameMap
+
+# Hits and misses of the per-actor path cache, see `BaseAI.get_cached_path_to`.
+path_cache_stats: Counter = Counter()
 
 class BaseAI(Action):
     sprite: Actor
     
+    # Cached path and what it was computed for. Class defaults so AIs from older saves still work.
+    path: List[Tuple[int, int]] = []
+    path_target: Optional[Tuple[int, int]] = None
+    path_gamemap: Optional[GameMap] = None
+    path_version = -1
+    
+    # How far the target may wander from the end of a cached path before it is recomputed.
+    repath_distance = 2
+    
+    # Cost of the last action taken through `act`, read by the scheduler after `perform`.
+    last_cost = Action.base_cost
+    
     def perform(self) -> None:
         raise NotImplementedError()
     
+    def act(self, action: Action) -> None:
+        """ Perform `action` for this AI's sprite, remembering its cost. """
+        self.last_cost = action.cost
+        return action.perform()
+    
+    def get_cached_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
+        """ Like `get_path_to`, but keeps the path across turns while it is still usable.
+        
+        Steps are consumed by popping from the front of the returned list.
+        """
+        if self.path_is_valid(dest_x, dest_y):
+            path_cache_stats['hits'] += 1
+            return self.path
+        
+        path_cache_stats['misses'] += 1
+        gamemap = self.sprite.gamemap
+        self.path = self.get_path_to(dest_x, dest_y)
+        self.path_target = dest_x, dest_y
+        self.path_gamemap = gamemap
+        self.path_version = gamemap.walkable_version
+        return self.path
+    
+    def path_is_valid(self, dest_x: int, dest_y: int) -> bool:
+        """ Return True if the cached path can still be followed towards (`dest_x`, `dest_y`). """
+        gamemap = self.sprite.gamemap
+        if not self.path or self.path_gamemap is not gamemap or self.path_version != gamemap.walkable_version:
+            return False
+        
+        target_x, target_y = self.path_target
+        if max(abs(dest_x - target_x), abs(dest_y - target_y)) > self.repath_distance:
+            return False
+        
+        # The next step must still be adjacent and open. The last step may be the target itself.
+        step_x, step_y = self.path[0]
+        if max(abs(step_x - self.sprite.x), abs(step_y - self.sprite.y)) != 1:
+            return False
+        return len(self.path) == 1 or not gamemap.movement_blocked[step_x, step_y]
+    
     def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
         """Compute and return a path to the target position.
 
         If there is no valid path then returns an empty list.
         """
-        # Copy the walkable array.
-        cost = np.array(self.sprite.gamemap.tiles['walkable'], dtype=np.int8)
-        
-        for sprite in self.sprite.gamemap.sprites:
-            # Check that an entity blocks movement and the cost isn't zero (blocking).
-            if sprite.blocks_movement and cost[sprite.x, sprite.y]:
-                # Add to the cost of a blocked position.
-                # A lower number means more enemies will take longer paths in
-                # order to surround the player.
-                cost[sprite.x, sprite.y] += 10
+        # The map keeps a cost array where tiles with blocking sprites cost extra.
+        # A lower number means more enemies will take longer paths in
+        # order to surround the player.
+        cost = self.sprite.gamemap.path_cost
                 
         # Create a graph from the cost array and pass that graph to a new pathfinder.
         graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
@@ -59,27 +106,14 @@ class HostileEnemy(BaseAI):
     def perform(self) -> Action:
         target = self.engine.player
         
-        visible = np.copy(self.sprite.gamemap.tiles['transparent'])
-
-        for sprite in self.sprite.gamemap.sprites:
-            if sprite.blocks_fov:
-                visible[sprite.x, sprite.y] = False
-        
-        vis_tiles = compute_fov(
-            visible,
-            (self.sprite.x, self.sprite.y),
-            radius=8,
-        )
+        perception = self.engine.perception
 
-        for sprite in self.engine.game_map.sprites - {self.sprite} - {sprite for sprite in self.engine.game_map.sprites if not hasattr(sprite, 'ai')}:
-            if not sprite.ai:
-                continue
-            sprite: Actor
-            if vis_tiles[sprite.x, sprite.y] and sprite.hostile and not sprite.ai.aggro_turn:# If another sprite in range becomes hostile also become hostile.
+        for sprite in perception.visible_actors(self.sprite):
+            if sprite.hostile and not sprite.ai.aggro_turn:# If another sprite in range becomes hostile also become hostile.
                 self.sprite.hostile = True
                 self.aggro_turn = int(self.lose_aggro_turns * 1/4 + 0.5)
             
-        if vis_tiles[target.x, target.y]: # If player in FOV become hostile
+        if perception.can_see(self.sprite, target): # If player in FOV become hostile
             self.sprite.hostile = True
             self.aggro_turn = 0
         elif self.sprite.hostile:
@@ -89,7 +123,7 @@ class HostileEnemy(BaseAI):
                 self.sprite.hostile = False
                 self.aggro_turn = 0
         else:
-            return WaitAction(self.sprite).perform()
+            return self.act(WaitAction(self.sprite))
         
         dx = target.x - self.sprite.x
         dy = target.y - self.sprite.y
@@ -97,17 +131,27 @@ class HostileEnemy(BaseAI):
         
         if self.engine.game_map.visible[self.sprite.x, self.sprite.y]:
             if distance <= 1:
-                return MeleeAction(self.sprite, dx, dy).perform()
+                return self.act(MeleeAction(self.sprite, dx, dy))
+        
+        # Step down the shared distance field to the player instead of pathfinding alone. If the field can't
+        # reach this actor or every closer tile is taken, fall back to a path of its own.
+        player_field = self.sprite.gamemap.player_field
+        if player_field.reachable(self.sprite.x, self.sprite.y):
+            step = player_field.next_step(self.sprite.x, self.sprite.y)
+            if step:
+                return self.act(MovementAction(
+                    self.sprite, step[0] - self.sprite.x, step[1] - self.sprite.y,
+                ))
             
-        self.path = self.get_path_to(target.x, target.y)
+        path = self.get_cached_path_to(target.x, target.y)
         
-        if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
+        if path:
+            dest_x, dest_y = path.pop(0)
+            return self.act(MovementAction(
                 self.sprite, dest_x - self.sprite.x, dest_y - self.sprite.y,
-            ).perform()
+            ))
             
-        return WaitAction(self.sprite).perform()
+        return self.act(WaitAction(self.sprite))
     
     
 class ConfusedEnemy(BaseAI):
@@ -146,4 +190,4 @@ class ConfusedEnemy(BaseAI):
             self.turns_remaining -= 1
             # The actor will either try to move or attack in the chosen random direction.
             # Its possible the actor will just bump into the wall, wasting a turn.
-            return BumpAction(self.entity, direction_x, direction_y,).perform()
+            return self.act(BumpAction(self.sprite, direction_x, direction_y,))
@@ -115,7 +115,7 @@ def dev_command(command: str, engine: Engine) -> str:
             
         
         case ['cls']:
-            engine.message_log.messages = []
+            engine.message_log.clear()
             return 'message log cleared.'
         
         case ['biginv']:
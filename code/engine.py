@@ -8,15 +8,20 @@ from tcod.map import compute_fov
 import exceptions
 from input_handler import MainGameEventHandler
 from message_log import MessageLog
-from render_functions import render_resource_bar, render_names_at_mouse_location
+from render_functions import render_hud_chrome, render_resource_bar, render_names_at_mouse_location
 
 import numpy as np
 import color
 
-import glob, os
+import glob, os, time
 
+from actions import Action
 from sprite import Actor
 from favorites import PlayerFavorites
+from perception import Perception
+from stat_engine import BatchStats
+from config import SETTINGS
+from save_file import SAVES
 
 import dill
 import lzma
@@ -46,6 +51,10 @@ class MainMenuEngine:
 class Engine:
     game_map: GameMap
     game_location: GameLocation
+    # When the game was started, shown in the load menu. None for games from before it was recorded.
+    created: float | None = None
+    # Seconds blinking HUD elements spend on each colour.
+    blink_period = 0.5
     
     def __init__(self, player: Actor):
         self.event_handler: EventHandler = MainGameEventHandler(self)
@@ -68,32 +77,73 @@ class Engine:
         self.no_clip = False
         
         self.turn_count = 0
-        self._blink_counter = 0
+        self.created = time.time()
+        
+        self.perception: Perception | None = None
         
     def message(self, text: str, fg: tuple[int, int, int] = color.white):
         self.message_log.add_message(text=text, fg=fg)
         
-    def handle_npc_turns(self) -> None:
-        for sprite in self.game_map.sprites - {self.player} - {sprite for sprite in self.game_map.sprites if not isinstance(sprite, Actor)}:
-            sprite: Actor
-            sprite.entity.update()
+    def handle_npc_turns(self, time: int = Action.base_cost) -> None:
+        """ Let every NPC whose time has come within the next `time` act, in the order they are due. """
+        scheduler = self.game_map.scheduler
+        deadline = scheduler.time + time
+        
+        # Each NPC's FOV is computed the first time it looks and shared for the rest of the turn.
+        self.perception = Perception(self.game_map)
+        if self.ai_on:
+            # Hostile NPCs all walk down the same distance field, only recomputed if the player or a blocker moved.
+            self.game_map.player_field.refresh(self.player.x, self.player.y)
+        
+        while (sprite := scheduler.pop_due(deadline)) is not None:
+            cost = Action.base_cost
             if sprite.ai and self.ai_on:
+                ai = sprite.ai
+                ai.last_cost = Action.base_cost
                 try:
-                    sprite.ai.perform()
+                    ai.perform()
                 except exceptions.Impossible:
                     pass # Ignore impossible action exceptions from AI.
+                cost = ai.last_cost
+            if sprite.is_alive and sprite in self.game_map.sprites:
+                scheduler.schedule(sprite, cost)
+        scheduler.time = deadline
             
+    def advance_turn(self, time: int = Action.base_cost) -> None:
+        """
+        Run the rest of the turn after the player acted, in a fixed order:
+        NPC turns from the scheduler -> effects, ageing and deaths -> FOV -> autosave every `auto_save_interval` turns.
+        Autosaves that failed in the background since the last turn are reported first.
+        """
+        for filename, error in SAVES.failures():
+            self.message(f'Could not save {filename.removesuffix(".sav")}: {error}', color.error)
+        self.handle_npc_turns(time)
+        self.update_entities()
+        self.turn_count += 1
+        self.update_fov()
+        if SETTINGS['auto_save'] and self.turn_count % SETTINGS.get('auto_save_interval', 100) == 0:
+            self.autosave()
+        
+    def update_entities(self) -> None:
+        """ Update every living character on the map at most once, skipping those with nothing to do.
+        
+        With the `batch_stats` setting on, the stats of every character left dirty are recomputed together in one
+        vectorized pass instead of one at a time. """
+        batch_stats = SETTINGS.get('batch_stats', False)
+        for actor in list(self.game_map.actors):
+            if actor.is_alive and actor.entity.needs_update:
+                actor.entity.update(refresh_stats=not batch_stats)
+                
+        if batch_stats:
+            BatchStats(
+                actor.entity for actor in self.game_map.actors if actor.entity.stats_dirty
+            ).apply()
+        
     def update_fov(self) -> None:
         """ Recompute the visible area based on the players point of view. """
         
-        visible = np.copy(self.game_map.tiles['transparent'])
-
-        for sprite in self.game_map.sprites:
-            if sprite.blocks_fov:
-                visible[sprite.x, sprite.y] = False
-
         self.game_map.visible[:] = compute_fov(
-            visible,
+            self.game_map.transparent,
             (self.player.x, self.player.y),
             radius=8,
         )
@@ -104,23 +154,23 @@ class Engine:
         self.game_map.explored |= self.game_map.visible
         
     @property
-    def blink_counter(self) -> int:
-        return self._blink_counter
-    @blink_counter.setter
-    def blink_counter(self, amount: int) -> None:
-        self._blink_counter = amount
-        if self.blink_counter >= 70:
-            self._blink_counter = 0
-            
+    def blinking(self) -> bool:
+        """ True while the HUD shows something blinking, so the screen needs redrawing without any input. """
+        return bool(self.player.entity.level_awaiting)
+    
+    def blink_on(self) -> bool:
+        """ Whether blinking things are highlighted right now. Goes by the clock, not by how often frames are drawn. """
+        return int(time.monotonic() / self.blink_period) % 2 == 1
+    
+    def next_blink(self) -> float:
+        """ Seconds until `blink_on` changes. """
+        return self.blink_period - time.monotonic() % self.blink_period
     
     def render(self, console: Console) -> None:
         self.game_map.render(console)
         
-        console.draw_rect(x=0, y=43, width=console.width, height=1, ch=ord('─'), fg=color.ui_color)
-        #console.print(x=0, y=43, string='╟', fg=color.ui_color)
-        #console.print(x=console.width-1, y=43, string='╢', fg=color.ui_color)
-        console.print(x=1, y=43, string=f'┤{"".join([" "]*len(self.player.entity.name))}├', fg=color.ui_color)
-        console.print(x=2, y=43, string=f'{self.player.entity.name}', fg=color.ui_text_color)
+        # Separators, frame lines and the name box come from a cached layer.
+        render_hud_chrome(console, self.player.entity.name)
         
         level_border = f'┤{"".join([" "]*(len(str(self.player.entity.level))+3))}├'
         level_text = self.player.entity.level
@@ -130,20 +180,13 @@ class Engine:
             level_text = '↑'
             
             level_color = color.ui_text_color
-            if self.blink_counter >= 40:
+            if self.blink_on():
                 level_color = color.ui_selected_text_color
-            self.blink_counter += 1
             
         console.print(x=19-len(level_border), y=43, string=level_border, fg=color.ui_color)
         console.print(x=20-len(level_border), y=43, string=f'Lv:{level_text}', fg=level_color)
         
         self.message_log.render(console=console, x=21, y=45, width=console.width-41, height=5)
-        console.print(x=20, y=43, string='┬', fg=color.ui_color)
-        console.draw_rect(x=20, y=44, width=1, height=40, ch=ord('│'), fg=color.ui_color)
-        console.print(x=console.width-20, y=43, string='┬', fg=color.ui_color)
-        console.draw_rect(x=console.width-20, y=44, width=1, height=40, ch=ord('│'), fg=color.ui_color)
-        
-        #console.print(x=20+(console.width-40)//2, y=43, string='┼', fg=color.ui_color)
         
         render_resource_bar(
             x=0,
@@ -178,9 +221,22 @@ class Engine:
         render_names_at_mouse_location(console=console, x=20+(console.width-40)//2, y=44, engine=self, alignment=tcod.constants.CENTER)
         self.old_hover_range = self.hover_range
         
-    def save_as(self, filename: str) -> None:
-        """ Save this instance as a compressed file. """
-        save_data = lzma.compress(pickle.dumps(self))
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # Only used during NPC turns, and it holds sprites of the current floor which is saved separately.
+        state['perception'] = None
+        return state
         
-        with open(f'data/user_data/save_data/{filename}', 'wb') as f:
-            f.write(save_data)
\ No newline at end of file
+    @property
+    def autosave_name(self) -> str:
+        """ File name of this game's autosave. Stays the same across sessions, so each game has a single slot. """
+        player_name = ''.join(char for char in self.player.name if char.isalnum()) or 'player'
+        return f'autosave_{player_name}_{int(self.created or 0)}.sav'
+        
+    def autosave(self) -> None:
+        """ Save this game's autosave, compressing and writing it in the background. """
+        SAVES.save_in_background(self.autosave_name, self)
+        
+    def save_as(self, filename: str) -> None:
+        """ Save this instance as a compressed file, with a header for the load menu. """
+        SAVES.save(filename, self)
\ No newline at end of file
@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List, Optional, Dict, Tuple
+from typing import TYPE_CHECKING, List, Optional, Dict, Tuple, Hashable
 
+import numpy as np
 import tcod
 
 from render_order import RenderOrder
@@ -17,6 +18,8 @@ from game_types import DamageTypes, ElementTypes, MaterialTypes
 from favorites import PlayerFavorites
 
 import utils
+from fingerprint import Fingerprinted
+from prototypes import Prototyped
 
 if TYPE_CHECKING:
     from sprite import Sprite, Actor
@@ -27,8 +30,10 @@ if TYPE_CHECKING:
     from world import GameMap
     from magic import AttackSpell
 
-class Entity():
+class Entity(Prototyped, Fingerprinted):
     parent: Sprite
+    fingerprint_exclude = ('parent', 'holder', 'prototype_id')
+    prototype_shared = ('name', 'description', 'value', 'tags', 'materials', 'interactable')
     
     def __init__(
         self,
@@ -79,7 +84,7 @@ class Entity():
             self.description = 'This should\'t happen.'
         self.value = value
         
-        self.tags = tags
+        self.tags = set(tags) # The default is shared between calls.
         self.materials = materials
         self.interactable = interactable
         
@@ -110,24 +115,14 @@ class Entity():
     def __repr__(self):
         return self.__str__()
     
-    def similar(self, other, bug = False) -> bool:
-        if isinstance(other, self.__class__):
-            for i, pair in enumerate(zip(
-                [_[1] for _ in vars(self).items() if (_[0] != 'parent' and _[0] != 'holder')],
-                [_[1] for _ in vars(other).items() if (_[0] != 'parent' and _[0] != 'holder')]
-            )):
-                if hasattr(pair[0], 'similar') and not pair[0].similar(pair[1]):
-                    return False
-                elif not hasattr(pair[0], 'similar') and pair[0] != pair[1]:
-                    return False
-                
-            return True
-        return False
 
-        
 class Item(Entity):
     parent: Optional[Sprite]
     holder: Optional[Character] = None
+    prototype_shared = Entity.prototype_shared + (
+        'weight', 'default_char', 'default_color', 'itemtype', 'itemsubtypes', 'rarity', 'edible', 'equippable',
+    )
+    prototype_parts = ('effect',)
     
     def __init__(
         self,
@@ -186,6 +181,17 @@ class Item(Entity):
         
         super().__init__(name=name, description=description, value=value, tags=tags, materials=materials, providing_parent=providing_parent, interactable=interactable)
         
+    @property
+    def stack_key(self) -> Hashable:
+        """ Hashable summary of everything that decides whether items stack. Cached until the item changes. """
+        return self.fingerprint
+    
+    def invalidate_fingerprint(self) -> None:
+        super().invalidate_fingerprint()
+        holder = self.__dict__.get('holder')
+        if holder is not None:
+            holder.invalidate_stacks()
+        
     @property
     def char(self) -> str:
         if self.default_char:
@@ -222,6 +228,75 @@ class Item(Entity):
         else:
             return 0, 0, 0
 
+class StatBlock:
+    """
+    A character's race, effect and item bonuses, summed in one pass.
+    
+    Built on demand by `Character.stat_block` and thrown away by `Character.invalidate_stats` whenever the
+    inventory, equipment, effects or race change, instead of re-walking effects and inventory on every read.
+    Resistances are kept as vectors ordered like `elements`.
+    """
+    
+    attributes = ('CON', 'STR', 'END', 'DEX', 'FOC', 'INT', 'WIL', 'WGT', 'LCK')
+    # Gated by `needs_equipped` like the attributes.
+    combat_stats = ('phys_defense', 'phys_negation', 'magc_defense', 'magc_negation', 'dodge_chance')
+    # Equipped items count per slot, the off hand at a quarter.
+    attack_stats = ('phys_atk', 'magc_atk')
+    elements = tuple(element for element in ElementTypes if element in ElementTypes.elements())
+    
+    def __init__(self, character: Character) -> None:
+        stats = self.attributes + self.combat_stats + self.attack_stats
+        self.intrinsic: Dict[str, float] = dict.fromkeys(stats, 0)
+        self.extrinsic: Dict[str, float] = dict.fromkeys(stats, 0)
+        
+        for attr in self.attributes:
+            self.intrinsic[attr] = character.race.attribute_bonuses[attr]
+        for effect in character.effects:
+            for attr in self.attributes:
+                self.intrinsic[attr] += effect.attribute_bonuses[attr]
+            for stat in self.combat_stats + self.attack_stats:
+                self.intrinsic[stat] += getattr(effect, f'{stat}_bonus')
+        
+        self.weight = 0
+        for item in character.inventory:
+            self.weight += item.weight
+            if item.effect.needs_equipped and not item.equipped:
+                continue
+            for attr in self.attributes:
+                self.extrinsic[attr] += item.effect.attribute_bonuses[attr]
+            for stat in self.combat_stats:
+                self.extrinsic[stat] += getattr(item.effect, f'{stat}_bonus')
+            if not item.effect.needs_equipped:
+                for stat in self.attack_stats:
+                    self.extrinsic[stat] += getattr(item.effect, f'{stat}_bonus')
+                
+        for slot, item in character.equipment.items():
+            if item is None:
+                continue
+            for stat in self.attack_stats:
+                bonus = getattr(item.effect, f'{stat}_bonus')
+                if slot in ['Left Hand', 'Right Hand'] and not character.dominant_hand.capitalize() in slot:
+                    bonus = int(bonus/4)
+                self.extrinsic[stat] += bonus
+        
+        self.intrinsic_resistances = self.resistance_vector(character.race.resistances)
+        for effect in character.effects:
+            self.intrinsic_resistances += self.resistance_vector(effect.resistances)
+        self.extrinsic_resistances = np.zeros(len(self.elements), dtype=int)
+        for item in character.inventory:
+            self.extrinsic_resistances += self.resistance_vector(item.effect.resistances)
+        self.resistance_totals = (
+            self.resistance_vector(character.base_resistances) + self.intrinsic_resistances + self.extrinsic_resistances
+        )
+        self.resistances = self.resistance_dict(self.resistance_totals)
+        
+    @classmethod
+    def resistance_vector(cls, resistances: Dict[ElementTypes, int]) -> np.ndarray:
+        return np.array([resistances.get(element, 0) for element in cls.elements], dtype=int)
+    
+    @classmethod
+    def resistance_dict(cls, vector: np.ndarray) -> Dict[ElementTypes, int]:
+        return {element: value.item() for element, value in zip(cls.elements, vector)}
         
 class Character(Entity):
     parent: Actor
@@ -229,6 +304,9 @@ class Character(Entity):
     attribute_names = {'CON': 'Constitution', 'STR': 'Strength', 'END': 'Endurance', 'DEX': 'Dexterity', 'FOC': 'Focus', 'INT': 'Intelligence', 'WIL': "Will", 'WGT': 'Weight', 'LCK': 'Luck'}
     pronouns: Dict[str, List[str]] = {'male': ['he', 'him', 'his'], 'female': ['she', 'hers', 'her'], 'other': ['they', 'them', 'theirs']}
     
+    fingerprint_exclude = Entity.fingerprint_exclude + ('stats_dirty', 'hp', 'mp', 'sp', '_hp', '_mp', '_sp', 'age')
+    fingerprint_transient = Entity.fingerprint_transient + ('_stat_block', '_item_stacks')
+    
     def __init__(
         self,
         name: str,
@@ -305,12 +383,13 @@ class Character(Entity):
         self.base_WGT = base_WGT # weight[conceptual](WGT) -> conceptual atk/resist
         self.base_LCK = base_LCK # luck(LCK) -> effects chance
         
+        self.base_resistances = {elem: 0 for elem in ElementTypes.elements()}
+        
         self.equipment: Dict[str, Optional[Item]] = {'Head': None, 'Chest': None, 'Hand': None,  'Legs': None, 'Foot': None, 'Amulet': None, 'Right Ring': None, 'Left Ring': None, 'Right Hand': None, 'Left Hand': None}
         #print(self.job.starting_equipment)
         for item in self.job.starting_equipment:
-            self.equip(copy.deepcopy(item), silent=True)
-        for spell in self.job.starting_spells:
-            self.spell_book.append(spell)
+            self.equip(item.instantiate(), silent=True)
+        self.spell_book = self.spell_book + list(self.job.starting_spells)
         
         self.invincible = False
         
@@ -318,8 +397,6 @@ class Character(Entity):
         if self.age is None:
             self.age = int(abs(random.random() - random.random()) * (1 + self.race.elderly_age) - self.race.adult_age) + self.race.adult_age
         
-        self.base_resistances = {elem: 0 for elem in ElementTypes.elements()}
-        
         super().__init__(name=name, description=description, value=0, tags=tags, materials=materials, providing_parent=providing_parent, interactable=interactable)
         self.update_stats()
         
@@ -330,162 +407,94 @@ class Character(Entity):
         return self.base_CON + self.CON_intrinsic_bonus + self.CON_extrinsic_bonus
     @property
     def CON_intrinsic_bonus(self) -> int:
-        total = self.race.attribute_bonuses['CON']
-        for effect in self.effects:
-            total += effect.attribute_bonuses['CON']
-        return total
+        return self.stat_block.intrinsic['CON']
     @property
     def CON_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.attribute_bonuses['CON']
-        return total
+        return self.stat_block.extrinsic['CON']
     
     @property
     def STR(self) -> int:
         return self.base_STR + self.STR_intrinsic_bonus + self.STR_extrinsic_bonus
     @property
     def STR_intrinsic_bonus(self) -> int:
-        total = self.race.attribute_bonuses['STR']
-        for effect in self.effects:
-            total += effect.attribute_bonuses['STR']
-        return total
+        return self.stat_block.intrinsic['STR']
     @property
     def STR_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.attribute_bonuses['STR']
-        return total
+        return self.stat_block.extrinsic['STR']
     
     @property
     def END(self) -> int:
         return self.base_END + self.END_intrinsic_bonus + self.END_extrinsic_bonus
     @property
     def END_intrinsic_bonus(self) -> int:
-        total = self.race.attribute_bonuses['END']
-        for effect in self.effects:
-            total += effect.attribute_bonuses['END']
-        return total
+        return self.stat_block.intrinsic['END']
     @property
     def END_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.attribute_bonuses['END']
-        return total
+        return self.stat_block.extrinsic['END']
     
     @property
     def DEX(self) -> int:
         return self.base_DEX + self.DEX_intrinsic_bonus + self.DEX_extrinsic_bonus
     @property
+    def speed(self) -> int:
+        """ How quickly this character acts, 100 being normal. Each point of DEX above or below 10 is 5% either way. """
+        return max(100 + (self.DEX - 10) * 5, 20)
+    @property
     def DEX_intrinsic_bonus(self) -> int:
-        total = self.race.attribute_bonuses['DEX']
-        for effect in self.effects:
-            total += effect.attribute_bonuses['DEX']
-        return total
+        return self.stat_block.intrinsic['DEX']
     @property
     def DEX_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.attribute_bonuses['DEX']
-        return total
+        return self.stat_block.extrinsic['DEX']
     
     @property
     def FOC(self) -> int:
         return self.base_FOC + self.FOC_intrinsic_bonus + self.FOC_extrinsic_bonus
     @property
     def FOC_intrinsic_bonus(self) -> int:
-        total = self.race.attribute_bonuses['FOC']
-        for effect in self.effects:
-            total += effect.attribute_bonuses['FOC']
-        return total
+        return self.stat_block.intrinsic['FOC']
     @property
     def FOC_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.attribute_bonuses['FOC']
-        return total
+        return self.stat_block.extrinsic['FOC']
     
     @property
     def INT(self) -> int:
         return self.base_INT + self.INT_intrinsic_bonus + self.INT_extrinsic_bonus
     @property
     def INT_intrinsic_bonus(self) -> int:
-        total = self.race.attribute_bonuses['INT']
-        for effect in self.effects:
-            total += effect.attribute_bonuses['INT']
-        return total
+        return self.stat_block.intrinsic['INT']
     @property
     def INT_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.attribute_bonuses['INT']
-        return total
+        return self.stat_block.extrinsic['INT']
     
     @property
     def WIL(self) -> int:
         return self.base_WIL + self.WIL_intrinsic_bonus + self.WIL_extrinsic_bonus
     @property
     def WIL_intrinsic_bonus(self) -> int:
-        total = self.race.attribute_bonuses['WIL']
-        for effect in self.effects:
-            total += effect.attribute_bonuses['WIL']
-        return total
+        return self.stat_block.intrinsic['WIL']
     @property
     def WIL_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.attribute_bonuses['WIL']
-        return total
+        return self.stat_block.extrinsic['WIL']
     
     @property
     def WGT(self) -> int:
         return self.base_WGT + self.WGT_intrinsic_bonus + self.WGT_extrinsic_bonus
     @property
     def WGT_intrinsic_bonus(self) -> int:
-        total = self.race.attribute_bonuses['WGT']
-        for effect in self.effects:
-            total += effect.attribute_bonuses['WGT']
-        return total
+        return self.stat_block.intrinsic['WGT']
     @property
     def WGT_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.attribute_bonuses['WGT']
-        return total
+        return self.stat_block.extrinsic['WGT']
     
     @property
     def LCK(self) -> int:
         return self.base_LCK + self.LCK_intrinsic_bonus + self.LCK_extrinsic_bonus
     @property
     def LCK_intrinsic_bonus(self) -> int:
-        total = self.race.attribute_bonuses['LCK']
-        for effect in self.effects:
-            total += effect.attribute_bonuses['LCK']
-        return total
+        return self.stat_block.intrinsic['LCK']
     @property
     def LCK_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.attribute_bonuses['LCK']
-        return total
+        return self.stat_block.extrinsic['LCK']
     
     # Resources
     @property
@@ -517,63 +526,29 @@ class Character(Entity):
         return self.base_phys_defense + self.phys_defense_intrinsic_bonus + self.phys_defense_extrinsic_bonus
     @property
     def phys_defense_intrinsic_bonus(self) -> float:
-        total = 0
-        for effect in self.effects:
-            total += effect.phys_defense_bonus
-        return total
+        return self.stat_block.intrinsic['phys_defense']
     @property
     def phys_defense_extrinsic_bonus(self) -> float:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.phys_defense_bonus
-        return total
-        
+        return self.stat_block.extrinsic['phys_defense']
     @property
     def phys_negation(self) -> int:
         return self.base_phys_negation + self.phys_negation_intrinsic_bonus + self.phys_negation_extrinsic_bonus
     @property
     def phys_negation_intrinsic_bonus(self) -> int:
-        total = 0
-        for effect in self.effects:
-            total += effect.phys_negation_bonus
-        return total
+        return self.stat_block.intrinsic['phys_negation']
     @property
     def phys_negation_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.phys_negation_bonus
-        return total
+        return self.stat_block.extrinsic['phys_negation']
     
     @property
     def phys_atk(self) -> int:
         return self.base_phys_atk + self.phys_atk_intrinsic_bonus + self.phys_atk_extrinsic_bonus
     @property
     def phys_atk_intrinsic_bonus(self) -> int:
-        total = 0
-        for effect in self.effects:
-            total += effect.phys_atk_bonus
-        return total
+        return self.stat_block.intrinsic['phys_atk']
     @property
     def phys_atk_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped:
-                continue
-            total += item.effect.phys_atk_bonus
-        for slot, item in self.equipment.items():
-            if item is None:
-                continue
-            if slot in ['Left Hand', 'Right Hand'] and self.dominant_hand.capitalize() in slot:
-                total += item.effect.phys_atk_bonus
-            elif slot in ['Left Hand', 'Right Hand']:
-                total += int(item.effect.phys_atk_bonus/4)
-            else:
-                total += item.effect.phys_atk_bonus
-        return total
+        return self.stat_block.extrinsic['phys_atk']
     
     
     @property
@@ -581,63 +556,30 @@ class Character(Entity):
         return self.base_magc_defense + self.magc_defense_intrinsic_bonus + self.magc_negation_extrinsic_bonus
     @property
     def magc_defense_intrinsic_bonus(self) -> float:
-        total = 0
-        for effect in self.effects:
-            total += effect.magc_defense_bonus
-        return total
+        return self.stat_block.intrinsic['magc_defense']
     @property
     def magc_defense_extrinsic_bonus(self) -> float:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.magc_defense_bonus
-        return total
+        return self.stat_block.extrinsic['magc_defense']
     
     @property
     def magc_negation(self) -> int:
         return self.base_magc_negation + self.magc_negation_intrinsic_bonus + self.magc_negation_extrinsic_bonus
     @property
     def magc_negation_intrinsic_bonus(self) -> int:
-        total = 0
-        for effect in self.effects:
-            total += effect.magc_negation_bonus
-        return total
+        return self.stat_block.intrinsic['magc_negation']
     @property
     def magc_negation_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.magc_negation_bonus
-        return total
+        return self.stat_block.extrinsic['magc_negation']
     
     @property
     def magc_atk(self) -> int:
         return self.base_magc_atk + self.magc_atk_intrinsic_bonus + self.magc_atk_extrinsic_bonus
     @property
     def magc_atk_intrinsic_bonus(self) -> int:
-        total = 0
-        for effect in self.effects:
-            total += effect.magc_atk_bonus
-        return total
+        return self.stat_block.intrinsic['magc_atk']
     @property
     def magc_atk_extrinsic_bonus(self) -> int:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped:
-                continue
-            total += item.effect.magc_atk_bonus
-        for slot, item in self.equipment.items():
-            if item is None:
-                continue
-            if slot in ['Left Hand', 'Right Hand'] and self.dominant_hand.capitalize() in slot:
-                total += item.effect.magc_atk_bonus
-            elif slot in ['Left Hand', 'Right Hand']:
-                total += int(item.effect.magc_atk_bonus/4)
-            else:
-                total += item.effect.magc_atk_bonus
-        return total
+        return self.stat_block.extrinsic['magc_atk']
     
     
     @property
@@ -645,36 +587,57 @@ class Character(Entity):
         return self.base_dodge_chance + self.dodge_chance_intrinsic_bonus + self.dodge_chance_extrinsic_bonus
     @property
     def dodge_chance_intrinsic_bonus(self) -> int:
-        total = 0
-        for effect in self.effects:
-            total += effect.dodge_chance_bonus
-        return total
+        return self.stat_block.intrinsic['dodge_chance']
     @property
     def dodge_chance_extrinsic_bonus(self) -> float:
-        total = 0
-        for item in self.inventory:
-            if item.effect.needs_equipped and not item.equipped:
-                continue
-            total += item.effect.dodge_chance_bonus
-        return total
+        return self.stat_block.extrinsic['dodge_chance']
     
     @property
     def resistances(self) -> Dict[ElementTypes, int]:
-        return utils.add_dict(self.base_resistances, self.intrinsic_resistances, self.extrinsic_resistances)
+        return self.stat_block.resistances
     @property
     def intrinsic_resistances(self) -> Dict[ElementTypes, int]:
-        total = self.race.resistances
-        for effect in self.effects:
-            total = utils.add_dict(total, effect.resistances)
-        return total
+        return StatBlock.resistance_dict(self.stat_block.intrinsic_resistances)
     @property
     def extrinsic_resistances(self) -> Dict[ElementTypes, int]:
-        total = {}
-        for item in self.inventory:
-            total = utils.add_dict(total, item.effect.resistances)
-        return total
+        return StatBlock.resistance_dict(self.stat_block.extrinsic_resistances)
+    
+    # Cached sums of the bonuses above, see `StatBlock`. Class default so characters from older saves build one.
+    _stat_block: Optional[StatBlock] = None
+    
+    @property
+    def stat_block(self) -> StatBlock:
+        if self._stat_block is None:
+            self._stat_block = StatBlock(self)
+        return self._stat_block
+    
+    def invalidate_stats(self) -> None:
+        """ Drop the cached stat block and fingerprint. Call whenever inventory, equipment, effects or race change. """
+        self._stat_block = None
+        self.stats_dirty = True
+        self.invalidate_fingerprint() # Those are changed in place, which `__setattr__` doesn't see.
+    
+    # Set when effects change, cleared by `update_stats`. Class default so characters from older saves recompute once.
+    stats_dirty = True
+    
+    @property
+    def old_age(self) -> int:
+        """ Age after which a character may die of old age. """
+        return int(self.race.average_lifespan-self.race.average_lifespan/4)
+    
+    @property
+    def needs_update(self) -> bool:
+        """ True if `update` has anything to do this turn. """
+        return (
+            self.stats_dirty
+            or self.hp == 0
+            or self.engine.turn_count % 1250 == 0
+            or (not 'eternal life' in self.tags and self.age > self.old_age)
+            or any(effect.automatic for effect in self.effects)
+        )
     
     def update_stats(self) -> None:
+        self.stats_dirty = False
         # Resource Stats
         try:
             hp_percent = self._hp/self.max_hp
@@ -712,22 +675,24 @@ class Character(Entity):
         
         self.base_dodge_chance = self.DEX *.01 + self.LCK *.001
         
-    def update(self) -> None:
+    def update(self, refresh_stats: bool = True) -> None:
+        """ `refresh_stats` False leaves dirty stats for the caller to recompute, see `stat_engine.BatchStats`. """
         super().update()
-        for effect in self.effects:
+        # Copy, effects remove themselves when they run out.
+        for effect in list(self.effects):
             if not effect.automatic:
                 continue
             try:
                 effect.activate(effect.get_action())
             except exceptions.Impossible:
                 pass
-            self.update_stats()
+            self.stats_dirty = True
             
         # Handle aging and death from ageing
         if self.engine.turn_count % 1250 == 0:
             self.age += 1
-        if not 'eternal life' in self.tags and self.age > int(self.race.average_lifespan-self.race.average_lifespan/4):
-            death_chance_at_age = min(((self.age-int(self.race.average_lifespan-self.race.average_lifespan/4))**2)/(((int(self.race.average_lifespan+self.race.average_lifespan/4)-int(self.race.average_lifespan-self.race.average_lifespan/4))**2)/100), 100)/100
+        if not 'eternal life' in self.tags and self.age > self.old_age:
+            death_chance_at_age = min(((self.age-self.old_age)**2)/(((int(self.race.average_lifespan+self.race.average_lifespan/4)-self.old_age)**2)/100), 100)/100
             
             if random.random() < death_chance_at_age:
                 self.engine.message_log.add_message(f'{self.name}, at {self.age} years old, died from old age.', fg=color.enemy_die)
@@ -737,19 +702,22 @@ class Character(Entity):
         if self.hp == 0 and self.parent.ai:
             self.die()
             
-        self.update_stats()
+        if self.stats_dirty and refresh_stats:
+            self.update_stats()
         
     def add_effect(self, effect: CharacterEffect) -> bool:
         """ Returns `True` if effect was applied. `False` if not. """
-        if not effect.stackable and [_ for _ in self.effects if _.similar(effect)]:
+        if not effect.stackable and any(_.similar(effect) for _ in self.effects):
             return False
         effect.parent = self
         self.effects.append(effect)
+        self.invalidate_stats()
         return True
         
     def remove_effect(self, effect: CharacterEffect) -> None:
         effect.parent = None
         self.effects.remove(effect)
+        self.invalidate_stats()
     
     # XP/Level
     @property
@@ -779,38 +747,39 @@ class Character(Entity):
 
     @property
     def weight(self) -> int:
-        total = 0
-        for item in self.inventory:
-            total += item.weight
-        return total
+        return self.stat_block.weight
+    
+    # Stack key -> items, in inventory order. Kept up to date by add/drop, rebuilt after anything else changes.
+    _item_stacks: Optional[Dict[Hashable, List[Item]]] = None
+    
+    @property
+    def item_stacks(self) -> Dict[Hashable, List[Item]]:
+        if self._item_stacks is None:
+            item_stacks: Dict[Hashable, List[Item]] = {}
+            for item in self.inventory:
+                item_stacks.setdefault(item.stack_key, []).append(item)
+            self._item_stacks = item_stacks
+        return self._item_stacks
     
     @property
     def inventory_as_stacks(self) -> List[List[Item]]:
-        inv_as_stacks: List[List[Item]] = []
+        return [list(stack) for stack in self.item_stacks.values()]
     
-        for item in self.inventory:
-            if not inv_as_stacks:
-                inv_as_stacks.append([item])
-                continue
-            
-            for stack in inv_as_stacks:
-                if [_ for _ in stack if item.similar(_)]:
-                    stack.append(item)
-                    break
-            else:
-                inv_as_stacks.append([item])
-                #print(vars(item))
-                #print()
-                
-        return inv_as_stacks
-
-            
+    def get_stack(self, key: Hashable) -> List[Item]:
+        """ Returns the inventory items with stack key `key`, empty if there are none. """
+        return list(self.item_stacks.get(key, ()))
+    
+    def invalidate_stacks(self) -> None:
+        self._item_stacks = None
         
     def add_inventory(self, item: Item, silent: bool = False) -> Optional[exceptions.Impossible]:
         if self.weight + item.weight > self.carry_weight:
             return exceptions.Impossible(f'{item.name.capitalize()} is too heavy to add to inventory.')
         self.inventory.append(item)
         item.holder = self
+        self.invalidate_stats()
+        if self._item_stacks is not None:
+            self._item_stacks.setdefault(item.stack_key, []).append(item)
         if not silent: self.parent.gamemap.engine.message_log.add_message(f'{item.name.capitalize()} added to inventory({self.weight}/{self.carry_weight}).')
         self.update_stats()
         
@@ -819,7 +788,7 @@ class Character(Entity):
             return
         
         if self.favorites:
-            self.favorites.update()
+            self.favorites.item_added(item)
         
     def drop_inventory(self, item: str | Item, silent: bool = False) -> None:
         """ `silent` to not print messages. """
@@ -835,6 +804,14 @@ class Character(Entity):
             self.unequip(item)
         self.inventory.remove(item)
         item.holder = None
+        self.invalidate_stats()
+        if self._item_stacks is not None:
+            stack = self._item_stacks[item.stack_key]
+            if stack[0] is item:
+                # The stack's place in the order comes from its first item, so rebuild.
+                self.invalidate_stacks()
+            else:
+                stack.remove(item)
         if not silent: self.parent.gamemap.engine.message_log.add_message(f'{item.name.capitalize()} dropped.')
         self.update_stats()
         
@@ -842,13 +819,10 @@ class Character(Entity):
             from spritegen import entity_to_sprite
             item.parent = entity_to_sprite(item)
         
-        item.parent.x = self.parent.x
-        item.parent.y = self.parent.y
-        self.parent.gamemap.sprites.add(item.parent)
-        item.parent.parent = self.parent.gamemap
+        item.parent.place(self.parent.x, self.parent.y, self.parent.gamemap)
         
         if self.favorites:
-            self.favorites.update()
+            self.favorites.item_removed(item)
         
     def get_with_name(self, name: str) -> Item:
         """ Returns Item in inventory with name `name`. """
@@ -902,6 +876,7 @@ class Character(Entity):
                 if not silent: self.parent.gamemap.engine.message_log.add_message(f'Equipped {item} on {slot}.')
                 self.equipment[slot] = item
                 item.equipped = True
+                self.invalidate_stats()
                 break
             
             for slot_val in item.equippable.items():
@@ -914,6 +889,7 @@ class Character(Entity):
                 if not silent: self.parent.gamemap.engine.message_log.add_message(f'Equipped {item} on {slot_val[0]}.')
                 self.equipment[slot_val[0]] = item
                 item.equipped = True
+                self.invalidate_stats()
                 break
         self.update_stats()
     
@@ -932,6 +908,7 @@ class Character(Entity):
                 
             self.equipment[list(self.equipment.keys())[list(self.equipment.values()).index(item)]] = None
             item.equipped = False
+            self.invalidate_stats()
             if not silent: self.parent.gamemap.engine.message_log.add_message(f'Unequipped {item}.')
         self.update_stats()
             
@@ -1129,21 +1106,11 @@ class Corpse(Item):
         
         self.dead_character = dead_character
         
+    fingerprint_exclude = Item.fingerprint_exclude + ('dead_character',)
+    
     def update(self) -> None:
         pass
         
-    def similar(self, other):
-        if isinstance(other, self.__class__):
-            for i, pair in enumerate(zip([_[1] for _ in vars(self).items() if _[0] != 'parent' and _[0] != 'dead_character'], [_[1] for _ in vars(other).items() if _[0] != 'parent' and _[0] != 'dead_character'])):
-                #print(list(self.__dict__.keys())[i])
-                #print(pair)
-                if hasattr(pair[0], 'similar') and not pair[0].similar(pair[1]):
-                    return False
-                elif not hasattr(pair[0], 'similar') and pair[0] != pair[1]:
-                    return False
-                
-            return True
-        
 class Door(Entity):
     def __init__(self, opened: bool = False, tags: set[str] = set(), materials: List[MaterialTypes] = [MaterialTypes.NON_BIOLOGICAL]) -> None:
         super().__init__(
@@ -1180,17 +1147,19 @@ class Door(Entity):
         self.parent.blocks_movement = False
         self.parent.blocks_fov = False
         self.opened = True
+        self.gamemap.walkable_version += 1 # Routes through the doorway changed, cached paths are stale.
         
     def close(self):
-        if hasattr(self.engine, 'game_map'):
-            sprite_on_top = self.engine.game_map.get_sprite_at_location(self.parent.x, self.parent.y, {self.parent})
-            if sprite_on_top:
-                raise exceptions.Impossible(f'Cannot close door, {sprite_on_top.name} is blocking door.')
-            
+        # Check the map the door is on, which isn't the current floor while a new one is being generated.
+        sprite_on_top = self.gamemap.get_sprite_at_location(self.parent.x, self.parent.y, {self.parent})
+        if sprite_on_top:
+            raise exceptions.Impossible(f'Cannot close door, {sprite_on_top.name} is blocking door.')
+        
         self.parent.char = '+'
         self.parent.blocks_movement = True
         self.parent.blocks_fov = True
         self.opened = False
+        self.gamemap.walkable_version += 1
         
     def lock(self, key: int) -> None:
         if self.lock_val != 0:
@@ -1206,6 +1175,8 @@ class Door(Entity):
             self.locked = False
             if key.effect.one_time:
                 key.holder.inventory.remove(key)
+                key.holder.invalidate_stats()
+                key.holder.invalidate_stacks()
             return
         raise exceptions.Impossible('Lock does not work on door.')
         
@@ -5,6 +5,8 @@ import actions, color, random, game_types, sys
 from game_types import ElementTypes
 
 from exceptions import Impossible
+from fingerprint import Fingerprinted
+from prototypes import Prototyped
 
 from input_handler import RangedAttackHandler
 from magic import AOESpell
@@ -14,8 +16,13 @@ if TYPE_CHECKING:
     from magic import AttackSpell
 
 _bonus_dict = {'CON': 0, 'STR': 0, 'END': 0, 'DEX': 0, 'FOC': 0, 'INT': 0, 'WIL': 0, 'WGT': 0, 'LCK': 0}
-class BaseEffect():
+class BaseEffect(Prototyped, Fingerprinted):
     parent: Entity
+    fingerprint_exclude = ('parent', 'prototype_id')
+    prototype_shared = (
+        'name', 'phys_atk_bonus', 'magc_atk_bonus', 'phys_defense_bonus', 'phys_negation_bonus', 'magc_defense_bonus',
+        'magc_negation_bonus', 'dodge_chance_bonus', 'attribute_bonuses', 'resistances', 'stackable',
+    )
     def __init__(
         self,
         name: str = None,
@@ -62,20 +69,12 @@ class BaseEffect():
         """Invoke this items ability."""
         raise Impossible(f'{self.parent} effect has no action.')
         
-    def similar(self, other):
-        if isinstance(other, self.__class__):
-            for i, pair in enumerate(zip([_[1] for _ in vars(self).items() if _[0] != 'parent'], [_[1] for _ in vars(other).items() if _[0] != 'parent'])):
-                if hasattr(pair[0], 'similar') and not pair[0].similar(pair[1]):
-                    return False
-                elif not hasattr(pair[0], 'similar') and pair[0] != pair[1]:
-                    return False
-            return True
-        return False
-        
 
 
 class ItemEffect(BaseEffect):
     parent: Item
+    prototype_shared = BaseEffect.prototype_shared + ('needs_equipped', 'consumable')
+    
     def __init__(
         self,
         name: str = None,
@@ -112,24 +111,15 @@ class ItemEffect(BaseEffect):
 
     def consume(self) -> None:
         """Remove the consumed item from its containing inventory."""
-        favorite_key = None
-        for key, item in self.parent.holder.favorites.items.items():
-            if isinstance(item, list) and self.parent in item:
-                favorite_key = key
-                break
-
-        if favorite_key:
-            self.parent.holder.favorites.items[key].remove(self.parent)
-            if not self.parent.holder.favorites.items[key]:
-                self.parent.holder.favorites.items[key] = None
-        
         if self.parent.holder.in_inventory(self.parent):
             self.parent.holder.inventory.remove(self.parent)
+            self.parent.holder.invalidate_stats()
+            self.parent.holder.invalidate_stacks()
         else:
-            self.parent.gamemap.sprites.remove(self.parent.parent)
+            self.parent.gamemap.remove_sprite(self.parent.parent)
         
         if self.parent.holder.favorites:
-            self.parent.holder.favorites.update()
+            self.parent.holder.favorites.item_removed(self.parent)
         
     def eat(self, action: actions.EffectAction) -> None:
         raise Impossible(f'{self.parent} is not edible.')
@@ -1,6 +1,6 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
-import tcod, copy
+from typing import TYPE_CHECKING, Hashable
+import tcod
 
 if TYPE_CHECKING:
     from entity import Item, Character
@@ -9,6 +9,13 @@ if TYPE_CHECKING:
     from actions import Action
 
 class PlayerFavorites:
+    """
+    Quick slots for item stacks, effects and spells.
+    
+    Item slots remember the kind of item put in them (see `_kind`) instead of the items, so a stack that runs out
+    is put back in its slot as soon as a matching item turns up again. The character reports inventory changes
+    with `item_added`/`item_removed` and only the slots they touch are refreshed.
+    """
     def __init__(self, parent) -> None:
         self.parent: Character = parent
         
@@ -25,25 +32,52 @@ class PlayerFavorites:
             tcod.event.KeySym.N0: None,
         }
         
-        self._mem: dict[tcod.event.KeySym, list[Item] | CharacterEffect | Spell | None] = self.items.copy()
+        # Kind of the items put in each slot, kept after the stack runs out.
+        self._keys: dict[tcod.event.KeySym, Hashable | None] = dict.fromkeys(self.items)
+        
+    def __setstate__(self, state: dict) -> None:
+        from fingerprint import Fingerprint
+        # Older saves remembered deep copies of the slotted stacks, or their stack keys.
+        mem = state.pop('_mem', None)
+        self.__dict__.update(state)
+        if mem is not None:
+            self._keys = {slot: self._kind(thing[0]) if self._is_stack(thing) else None for slot, thing in mem.items()}
+        for slot, key in self._keys.items():
+            if isinstance(key, Fingerprint):
+                # Item prototypes are registered under their names, so the class and name in the key give the kind.
+                item_type, attributes = key.key
+                self._keys[slot] = item_type, dict(attributes)['name']
+        
+    @staticmethod
+    def _kind(item: Item) -> Hashable:
+        """
+        What an item slot remembers: the prototype the item was spawned from, or its name if it wasn't. Unlike the
+        stack key this stays the same when the item is equipped or its effect changes.
+        """
+        return type(item), item.prototype_id or item.name
+        
+    @staticmethod
+    def _is_stack(thing) -> bool:
+        from entity import Item
+        return isinstance(thing, list) and bool(thing) and all(isinstance(t, Item) for t in thing)
         
     def add_fav(self, slot: tcod.event.KeySym, item: list[Item] | CharacterEffect | Spell) -> None:
         for s, i in self.items.items():
             if i == item:
                 self.items[s] = None
-                self._mem[s] = None
+                self._keys[s] = None
         
         self.items[slot] = item
-        self._mem[slot] = copy.deepcopy(item)
+        self._keys[slot] = self._kind(item[0]) if self._is_stack(item) else None
         
     def remove_fav(self, slot: tcod.event.KeySym | None = None, item: list[Item] | CharacterEffect | Spell | None = None) -> None:
         if slot:
             self.items[slot] = None
-            self._mem[slot] = None
+            self._keys[slot] = None
         elif item:
             i = list(self.items.keys())[list(self.items.values()).index(item)]
             self.items[i] = None
-            self._mem[i] = None
+            self._keys[i] = None
             
         
     def activate_slot(self, slot) -> Action | None:
@@ -59,30 +93,30 @@ class PlayerFavorites:
         elif isinstance(thing, Spell):
             return thing.get_action(self.parent.engine)
         
-    def update(self) -> None:
-        from entity import Item
+    def item_added(self, item: Item) -> None:
+        """ Put `item` in every slot remembering its kind, refilling slots whose stack ran out. """
+        kind = self._kind(item)
+        for slot, slot_kind in self._keys.items():
+            if slot_kind == kind:
+                self._refresh_slot(slot)
+                
+    def item_removed(self, item: Item) -> None:
+        """ Take `item` out of any slot holding it. The slot stays reserved for its kind if the stack runs out. """
+        for slot, thing in self.items.items():
+            if isinstance(thing, list) and any(i is item for i in thing):
+                self._refresh_slot(slot)
         
-        
-        for slot, item in self.items.items():
-            # If new items get added that are the same add them to favorites
-            if isinstance(item, list) and all(isinstance(t, Item) for t in item):
-                for i in self.parent.inventory_as_stacks:
-                    if item[0].similar(i[0]):
-                        self.add_fav(slot, i)
-                        
-            # Look to see if favorites items are no longer in inventory and remove
-            if isinstance(item, list) and all(isinstance(t, Item) for t in item) and item not in self.parent.inventory_as_stacks:
-                self.items[slot] = None
-            
-        # Look in mem to see if new items should be added to favorites
-        for slot, item in self._mem.items():
-            if not item:
-                continue
-            if not self.items[slot] and isinstance(item, list) and all(isinstance(t, Item) for t in item):
-                for i in self.parent.inventory_as_stacks:
-                    if item[0].similar(i[0]):
-                        self.add_fav(slot, i)
-                        
-        
-        
-        
\ No newline at end of file
+    def update(self) -> None:
+        """ Refresh every item slot from the inventory. """
+        for slot, key in self._keys.items():
+            if key is not None:
+                self._refresh_slot(slot)
+                
+    def _refresh_slot(self, slot: tcod.event.KeySym) -> None:
+        stacks = [stack for stack in self.parent.item_stacks.values() if self._kind(stack[0]) == self._keys[slot]]
+        # Items of one kind can be in several stacks, e.g. if some are equipped. Keep to the one already slotted.
+        slotted = {id(item) for item in self.items[slot] or ()} if self._is_stack(self.items[slot]) else set()
+        stack = next((stack for stack in stacks if any(id(item) in slotted for item in stack)), None)
+        if stack is None and stacks:
+            stack = stacks[0]
+        self.items[slot] = list(stack) if stack is not None else None
@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import Hashable
+
+
+class Fingerprint:
+    """ Hashable structural key with its hash worked out once. Equal fingerprints mean `similar` objects. """
+    __slots__ = ('key', '_hash')
+
+    def __init__(self, key: tuple) -> None:
+        self.key = key
+        self._hash = hash(key)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        # Only compare the structure when the hashes collide.
+        return isinstance(other, Fingerprint) and self._hash == other._hash and (self.key is other.key or self.key == other.key)
+
+    def __reduce__(self):
+        # String hashes change between runs, so work the hash out again when loaded.
+        return Fingerprint, (self.key,)
+
+
+class Fingerprinted:
+    """
+    Mixin giving an object a cached `fingerprint` of its attributes and a `similar` that compares fingerprints.
+
+    The fingerprint is dropped whenever an attribute not in `fingerprint_exclude` is assigned, and the parent is
+    told so it can drop its own. Mutating a list, dict or set attribute in place is not seen, assign a new one or
+    call `invalidate_fingerprint` after. Attributes written every turn that don't decide `similar`, like positions
+    and resources, belong in `fingerprint_exclude` so writing them doesn't drop the fingerprint.
+    """
+
+    # Attributes that don't take part in `similar`.
+    fingerprint_exclude: tuple = ('parent',)
+    # Cached values that are rebuilt on demand, so they are left out of pickles and copies.
+    fingerprint_transient: tuple = ('_fingerprint',)
+
+    @property
+    def fingerprint(self) -> Fingerprint:
+        fingerprint = self.__dict__.get('_fingerprint')
+        if fingerprint is None:
+            fingerprint = self.__dict__['_fingerprint'] = Fingerprint(structure_key(self))
+        return fingerprint
+
+    def invalidate_fingerprint(self) -> None:
+        if self.__dict__.get('_fingerprint') is None:
+            return # Nothing cached here, so nothing above depends on it either.
+        self.__dict__['_fingerprint'] = None
+        parent = self.__dict__.get('parent')
+        if isinstance(parent, Fingerprinted):
+            parent.invalidate_fingerprint()
+
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        if name not in self.fingerprint_exclude and name not in self.fingerprint_transient:
+            self.invalidate_fingerprint()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for name in self.fingerprint_transient:
+            state.pop(name, None)
+        return state
+
+    def similar(self, other) -> bool:
+        return isinstance(other, Fingerprinted) and self.fingerprint == other.fingerprint
+
+
+def structure_key(obj: Fingerprinted) -> tuple:
+    """ Hashable key for `obj`'s attributes, leaving out its excluded and transient ones.
+
+    Attributes that are themselves `Fingerprinted` are compared by fingerprint, everything else by equality. """
+    skip = obj.fingerprint_exclude + obj.fingerprint_transient
+    return (type(obj), tuple(
+        (name, _attribute_key(value)) for name, value in sorted(vars(obj).items(), key=lambda pair: pair[0])
+        if name not in skip
+    ))
+
+def _attribute_key(value) -> Hashable:
+    if isinstance(value, Fingerprinted):
+        return value.fingerprint
+    return _equality_key(value)
+
+def _equality_key(value) -> Hashable:
+    """ Hashable stand in for `value` that compares equal whenever `value` does. """
+    # Frozen copies of lists and sets shared with a prototype key the same as the originals.
+    if isinstance(value, (list, tuple)):
+        return (tuple, tuple(_equality_key(v) for v in value))
+    if isinstance(value, dict):
+        return (dict, frozenset((k, _equality_key(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(value))
+    try:
+        hash(value)
+    except TypeError:
+        return ('unhashable', id(value))
+    return value
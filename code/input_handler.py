@@ -33,6 +33,7 @@ import color, exceptions, copy
 from game_types import ItemTypes
 
 from message_log import MessageLog
+from save_file import SAVES
 
 import numpy as np
 
@@ -104,10 +105,9 @@ class EventHandler(BaseEventHandler):
         """ Handle actions return from event methods.
         
         Returns True if the action will advance a turn. """
-        if hasattr(self.engine, 'update_fov'):
-            self.engine.update_fov()
-        
         if action is None:
+            if hasattr(self.engine, 'update_fov'):
+                self.engine.update_fov()
             return False
         
         try:
@@ -116,13 +116,7 @@ class EventHandler(BaseEventHandler):
             self.engine.message_log.add_message(exc.args[0], color.impossible)
             return False # Skip enemy turn on exceptions.
         
-        self.engine.handle_npc_turns()
-        
-        for sprite in self.engine.game_map.sprites:
-            sprite.entity.update()
-        
-        
-        self.engine.turn_count += 1
+        self.engine.advance_turn(action.cost)
         return True
             
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
@@ -141,27 +135,21 @@ class LoadHandler(EventHandler):
         self.parent = parent
         
         self.selected_index = 0
-        
-        self.saved_games: list[str] = []
-        for file in glob.glob("data\\user_data\\save_data\\*.sav"):
-            self.saved_games.append(file)
-        sg_sorted = sorted(self.saved_games, key=os.path.getctime, reverse=True)
-        self.saved_games = [sg.replace('data\\user_data\\', '').replace('.sav', '') for sg in sg_sorted]
-        self.create_times = [datetime.utcfromtimestamp(os.path.getctime(sg)).strftime('%Y-%m-%d %H:%M:%S') for sg in sg_sorted]
+    
+    @property
+    def saved_games(self) -> list[str]:
+        """ File names of the saves, most recent first. """
+        return SAVES.sorted()
     
     def popup_result(self, result) -> None:
         if not result:
             return
-        os.remove(f'data\\user_data\\{self.saved_games[self.selected_index]}.sav')
+        SAVES.delete(self.saved_games[self.selected_index])
         self.selected_index = 0
         
     def on_render(self, console: tcod.console.Console) -> None:
-        self.saved_games = []
-        for file in glob.glob("data\\user_data\\*.sav"):
-            self.saved_games.append(file)
-        sg_sorted = sorted(self.saved_games, key=os.path.getctime, reverse=True)
-        self.saved_games = [sg.replace('data\\user_data\\', '').replace('.sav', '') for sg in sg_sorted]
-        self.create_times = [datetime.utcfromtimestamp(os.path.getctime(sg)).strftime('%Y-%m-%d %H:%M:%S') for sg in sg_sorted]
+        saved_games = self.saved_games
+        self.selected_index = min(self.selected_index, max(len(saved_games)-1, 0))
         
         saved_games_list_console = tcod.console.Console(25, 48)
         
@@ -171,21 +159,19 @@ class LoadHandler(EventHandler):
 
         saved_games_list_console.print(x=saved_games_list_console.width//2-len('Select Saved Game')//2, y=2, string='Select Saved Game', fg=color.ui_text_color)
 
-        if not self.saved_games:
+        if not saved_games:
             saved_games_list_console.print(x=1, y=saved_games_list_console.height//2, string='No Saved Games Detected', fg=color.ui_text_color)
 
         sg_y = 5
         y_limit = saved_games_list_console.height - 10
         scroll_factor = max(self.selected_index-y_limit, 0)
 
-        for i, save_game in enumerate(self.saved_games[scroll_factor:]):
-            if i > y_limit:
-                continue
+        for i, save_game in enumerate(SAVES.page(scroll_factor, y_limit+1)):
             text_color = color.ui_text_color
             if i+scroll_factor == self.selected_index:
                 text_color = color.ui_cursor_text_color
             
-            saved_games_list_console.print(x=2, y=sg_y, string=save_game, fg=text_color)
+            saved_games_list_console.print(x=2, y=sg_y, string=save_game.removesuffix('.sav'), fg=text_color)
             
             sg_y+=1
         
@@ -199,36 +185,21 @@ class LoadHandler(EventHandler):
         
         saved_game_info_console.print(x=0, y=10, string=f'╠{"".join(["─"]*(saved_game_info_console.width-2))}╣')
         
-        if self.saved_games:
-            tileset = tcod.tileset.load_tilesheet(
-                SETTINGS['tileset_file'], 16, 16, tcod.tileset.CHARMAP_CP437
-            )
-            from setup_game import load_game
-            preview_engine = load_game(f'{self.saved_games[self.selected_index]}.sav')
-
-            tile = tileset.get_tile(ord(preview_engine.player.char))[:, :, 3:]
-
-            new_tile = np.zeros((10, 10, 3), dtype=np.uint8)
-            for i, row in enumerate(new_tile):
-                for j, col in enumerate(row):
-                    for k, a in enumerate(col):
-                        if tile[i, j] == 255:
-                            new_tile[i, j, k] = preview_engine.player.color[k]
-                        else:
-                            new_tile[i, j, k] = 0
-
+        if saved_games:
+            # Only the header is read, and only again once the file changes.
+            header = SAVES.header(saved_games[self.selected_index])
 
-            img = tcod.image.Image.from_array(new_tile)
+            img = render_functions.glyph_image(header['char'], tuple(header['color']), SETTINGS['tileset_file'])
             img.blit(saved_game_info_console, x=saved_game_info_console.width//2, y=6, bg_blend=1, scale_x=1, scale_y=1, angle=0)
         
             y_offset = 12
-            saved_game_info_console.print(x=2, y=y_offset, string=f'Name: {preview_engine.player.name}', fg=color.ui_text_color)
-            saved_game_info_console.print(x=2, y=y_offset+1, string=f'Race: {preview_engine.player.entity.race.name}', fg=color.ui_text_color)
-            saved_game_info_console.print(x=2, y=y_offset+2, string=f'Class: {preview_engine.player.entity.job.name} Lv{preview_engine.player.entity.level}', fg=color.ui_text_color)
+            saved_game_info_console.print(x=2, y=y_offset, string=f'Name: {header["name"]}', fg=color.ui_text_color)
+            saved_game_info_console.print(x=2, y=y_offset+1, string=f'Race: {header["race"]}', fg=color.ui_text_color)
+            saved_game_info_console.print(x=2, y=y_offset+2, string=f'Class: {header["job"]} Lv{header["level"]}', fg=color.ui_text_color)
 
-            saved_game_info_console.print(x=2, y=y_offset+4, string=f'Number of Turns: {preview_engine.turn_count}', fg=color.ui_text_color)
+            saved_game_info_console.print(x=2, y=y_offset+4, string=f'Number of Turns: {header["turn_count"]}', fg=color.ui_text_color)
 
-            saved_game_info_console.print(x=2, y=y_offset+6, string=f'Save Created: \n{self.create_times[self.selected_index]}', fg=color.ui_text_color)
+            saved_game_info_console.print(x=2, y=y_offset+6, string=f'Save Created: \n{datetime.utcfromtimestamp(header["saved"]).strftime("%Y-%m-%d %H:%M:%S")}', fg=color.ui_text_color)
         
         saved_game_info_console.blit(console, dest_x=console.width-saved_game_info_console.width-5, dest_y=10)
         
@@ -247,7 +218,7 @@ class LoadHandler(EventHandler):
                 
             case tcod.event.KeySym.RETURN if self.saved_games:
                 from setup_game import load_game
-                self.engine = load_game(f'{self.saved_games[self.selected_index]}.sav')
+                self.engine = load_game(self.saved_games[self.selected_index])
                 self.message('loaded game', color.valid)
 
 
@@ -1291,12 +1262,9 @@ class PauseMenuEventHandler(MenuListEventHandler):
                 if SETTINGS['dev_mode']:
                     raise exceptions.QuitWithoutSaving()
                 
-                saves = glob.glob("data\\user_data\\*.sav")
-                if saves:
-                    sg_sorted = sorted(saves, key=os.path.getctime, reverse=True)
-                    from setup_game import load_game
-                    temp_load = load_game(sg_sorted[0])
-                    if self.engine.turn_count == temp_load.turn_count:
+                latest_save = SAVES.latest()
+                if latest_save is not None:
+                    if self.engine.turn_count == SAVES.header(latest_save)['turn_count']:
                         raise exceptions.QuitWithoutSaving()
                 raise SystemExit()
             
@@ -1337,7 +1305,7 @@ class MultiPickupHandler(MenuListEventHandler):
             for i in indexes:
                 result = self.actor.entity.add_inventory(self.items[i].entity)
                 if not result:
-                    self.engine.game_map.sprites.remove(self.items[i])
+                    self.engine.game_map.remove_sprite(self.items[i])
                     continue
                 self.engine.message_log.add_message(result.args[0], color.impossible)
         match event.sym:
@@ -1822,11 +1790,11 @@ class MainGameEventHandler(EventHandler):
                     self.engine.hover_depth += CURSOR_Y_KEYS[key]
             
             case tcod.event.KeySym.F5: # Quick Save
-                files = glob.glob("data\\user_data\\quicksave*.sav")
+                latest_save = SAVES.latest('quicksave_')
                 save_num = 1
-                if files:
-                    os.remove(files[0])
-                    save_num = int(files[0].replace("data\\user_data\\quicksave_", '').replace(".sav", ''))+1
+                if latest_save is not None:
+                    SAVES.delete(latest_save)
+                    save_num = int(latest_save.removeprefix('quicksave_').removesuffix('.sav'))+1
                 
                 self.engine.save_as(f'quicksave_{save_num}.sav')
                 self.message('quick save', color.valid)
@@ -1835,9 +1803,9 @@ class MainGameEventHandler(EventHandler):
             case tcod.event.KeySym.F9: # Quick load
                 from setup_game import load_game
                 
-                files = glob.glob("data\\user_data\\quicksave*.sav")
-                if files:
-                    self.engine = load_game(files[0].replace("data\\user_data\\", ''))
+                latest_save = SAVES.latest('quicksave_')
+                if latest_save is not None:
+                    self.engine = load_game(latest_save)
                     self.message('quick load', color.valid)
                     print('quick load')
             
@@ -1859,7 +1827,7 @@ class HistoryViewer(EventHandler):
     """Print the history on a larger window which can be navigated."""
     def __init__(self, engine: Engine) -> None:
         super().__init__(engine)
-        self.log_length = len(engine.message_log.messages)
+        self.log_length = len(engine.message_log)
         self.cursor = self.log_length - 1
         
     def on_render(self, console: tcod.console.Console) -> None:
@@ -1878,14 +1846,16 @@ class HistoryViewer(EventHandler):
         log_console.print(x=0, y=40, string='┤', fg=color.ui_color)
         log_console.print(x=log_console.width-1, y=40, string='├', fg=color.ui_color)
         
-        # Render the message log using the cursor parameter.
+        # Render the message log using the cursor parameter. Every message takes at least a line, so only the last
+        # `height` up to the cursor can show, which keeps spilled history from being read in full.
+        height = log_console.height - 2
         self.engine.message_log.render_messages(
             log_console,
             1,
             1,
             log_console.width - 2,
-            log_console.height - 2,
-            self.engine.message_log.messages[:self.cursor+1],
+            height,
+            self.engine.message_log.get_messages(self.cursor + 1 - height, self.cursor + 1),
         )
         log_console.blit(console, 20, 3)
         
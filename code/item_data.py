@@ -8,6 +8,8 @@ import magic
 
 from game_types import ItemTypes, ItemSubTypes, MagicFocusTypes
 
+from prototypes import PROTOTYPES
+
 health_potion = Item(
     'Health Potion', 100, 1, itemtype=ItemTypes.POTION, effect=HealingEffect(amount=4, type='hp'), rarity= 25
 )
@@ -53,4 +55,7 @@ simple_key = Item(
 
 ITEMS = [health_potion, sword, fire_ball_scroll, lightning_bolt_scroll, mana_potion, staff, dagger, leather_jerkin, robes, chest_plate]
 
-ITEMS_NAME_DICT = {value.name: value for value in ITEMS}
\ No newline at end of file
+ITEMS_NAME_DICT = {value.name: value for value in ITEMS}
+
+for prototype in [*ITEMS, simple_key]:
+    PROTOTYPES.register(prototype.name, prototype)
\ No newline at end of file
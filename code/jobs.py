@@ -5,8 +5,6 @@ import item_data
 
 import magic
 
-import copy
-
 if TYPE_CHECKING:
     from entity import Character, Item
     from magic import AttackSpell
@@ -26,6 +24,10 @@ class BaseJob():
         self.starting_equipment = starting_equipment
         self.starting_spells = starting_spells
         self.rarity = rarity
+        
+    def __reduce__(self):
+        # Every character shares the jobs in JOBS, so only the name is saved.
+        return get_job, (self.name,)
 
 class Mage(BaseJob):
     def __init__(self) -> None:
@@ -33,7 +35,7 @@ class Mage(BaseJob):
             name='Mage',
             default_color=[0, 0, 255],
             rarity=5,
-            starting_equipment = list(map(copy.deepcopy, [item_data.staff, item_data.robes])),
+            starting_equipment = [item_data.staff, item_data.robes],
             starting_spells=[magic.FireBolt()]
         )
 
@@ -42,7 +44,7 @@ class Rouge(BaseJob):
         super().__init__(
             name='Rouge',
             default_color=[0, 255, 0],
-            starting_equipment = list(map(copy.deepcopy, [item_data.dagger, item_data.leather_jerkin]))
+            starting_equipment = [item_data.dagger, item_data.leather_jerkin]
         )
 
 class Fighter(BaseJob):
@@ -51,7 +53,10 @@ class Fighter(BaseJob):
             name='Fighter',
             default_color=[255, 0, 0],
             rarity= 15,
-            starting_equipment = list(map(copy.deepcopy, [item_data.sword, item_data.chest_plate]))
+            starting_equipment = [item_data.sword, item_data.chest_plate]
         )
         
-JOBS: List[BaseJob] = [Mage(), Rouge(), Fighter()]
\ No newline at end of file
+JOBS: List[BaseJob] = [Mage(), Rouge(), Fighter()]
+
+def get_job(name: str) -> BaseJob:
+    return next(job for job in JOBS if job.name == name)
\ No newline at end of file
@@ -9,13 +9,16 @@ from game_types import DamageTypes, MagicFocusTypes, GameTypeNames, ElementTypes
 from input_handler import RangedAttackHandler
 
 from values import LockValues
+from fingerprint import Fingerprinted
 
 if TYPE_CHECKING:
     from entity import Character
     from sprite import Actor
     from engine import Engine
 
-class Spell():
+class Spell(Fingerprinted):
+    fingerprint_exclude = ('parent', 'dead_character')
+    
     def __init__(self, name: str, cost: int, range: int, activation_time: int, color: Tuple[int, int, int], duration: int = 0, element: ElementTypes = ElementTypes.NONE, req_focus_type: MagicFocusTypes | None = None) -> None:
         """ `activation_time` turns needed to cast spell. 0 is instant.\n\n`duration` turns spell is active for. 0 is forever"""
         self.name = name
@@ -82,17 +85,6 @@ class Spell():
             spell=self
         )
         return None
-        
-        
-    def similar(self, other) -> bool:
-        if isinstance(other, self.__class__):
-            for i, pair in enumerate(zip([_[1] for _ in vars(self).items() if _[0] != 'parent' and _[0] != 'dead_character'], [_[1] for _ in vars(other).items() if _[0] != 'parent' and _[0] != 'dead_character'])):
-                if hasattr(pair[0], 'similar') and not pair[0].similar(pair[1]):
-                    return False
-                elif not hasattr(pair[0], 'similar') and pair[0] != pair[1]:
-                    return False
-            return True
-        return False
 
 class AttackSpell(Spell):
     def __init__(self, name: str, cost: int, damage: int, range: int, element: ElementTypes, activation_time: int, color: Tuple[int, int, int], req_focus_type: MagicFocusTypes | None = None) -> None:
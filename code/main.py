@@ -10,6 +10,11 @@ import input_handler
 import os, win32api, cv2
 
 tileset_file = SETTINGS['tileset_file']
+
+# Seconds to block waiting for events while idle, and between frames while something animates.
+IDLE_TIMEOUT = 0.5
+ANIMATION_FRAME_TIME = 1 / 60
+
 def refresh_tileset() -> None:
     global tileset_file
     tileset_file = SETTINGS['tileset_file']
@@ -30,10 +35,11 @@ def main() -> None:
     )
     from engine import MainMenuEngine
     # See if a reboot save exists and reload if it does. If it doesn't go to main menu.
-    if os.path.exists('data\\user_data\\TempRebootSave.sav'):
+    from save_file import SAVES
+    if 'TempRebootSave.sav' in SAVES:
         from setup_game import load_game
         handler = load_game('TempRebootSave.sav').event_handler
-        os.remove('data\\user_data\\TempRebootSave.sav')
+        SAVES.delete('TempRebootSave.sav')
     else:
         handler = MainMenuEngine().event_handler
     
@@ -54,43 +60,66 @@ def main() -> None:
         
         context.sdl_window.position = screen_width//2-context.sdl_window.size[0]//2, screen_height//2-context.sdl_window.size[1]//2
         
-        context.sdl_window.fullscreen = SETTINGS['full_screen']
-        if SETTINGS['maximized']:
-            context.sdl_window.maximize()
+        window_settings = None
+        def apply_window_settings() -> None:
+            """ Push the window settings to the window, only if they changed since last time. """
+            nonlocal window_settings
+            if window_settings == (SETTINGS['full_screen'], SETTINGS['maximized']):
+                return
+            window_settings = SETTINGS['full_screen'], SETTINGS['maximized']
+            context.sdl_window.fullscreen = SETTINGS['full_screen']
+            if SETTINGS['maximized']:
+                context.sdl_window.maximize()
+            else:
+                context.sdl_window.restore()
 
         try:
+            dirty = True
+            blink = None
             while True:
+                apply_window_settings()
                 
-                context.sdl_window.fullscreen = SETTINGS['full_screen']
-                if SETTINGS['maximized']:
-                    context.sdl_window.maximize()
-                else:
-                    context.sdl_window.restore()
-                
+                if handler is not handler.engine.event_handler:
+                    dirty = True
                 handler = handler.engine.event_handler
                 
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console, integer_scaling=False, keep_aspect=True)
+                # Handlers that animate or time things out set `engine.wait` to False and are redrawn every frame.
+                animating = not getattr(handler.engine, 'wait', False)
+                # Blinking HUD elements only need a redraw each time they change colour.
+                blinking = getattr(handler.engine, 'blinking', False)
+                if blinking and handler.engine.blink_on() != blink:
+                    blink = handler.engine.blink_on()
+                    dirty = True
+                if dirty or animating:
+                    root_console.clear()
+                    handler.on_render(console=root_console)
+                    context.present(root_console, integer_scaling=False, keep_aspect=True)
+                    dirty = False
 
+                mouse_location = getattr(handler.engine, 'mouse_location', None)
                 try:
-                    if False: # hasattr(handler, 'engine') and handler.engine.wait
-                        for event in tcod.event.wait():
-                            context.convert_event(event)
-                            handler.handle_events(event)
-                    else:
-                        for event in tcod.event.get():
-                            context.convert_event(event)
-                            handler.handle_event(event)
+                    timeout = ANIMATION_FRAME_TIME if animating else IDLE_TIMEOUT
+                    if blinking:
+                        timeout = min(timeout, handler.engine.next_blink())
+                    for event in tcod.event.wait(timeout):
+                        context.convert_event(event)
+                        # Hovering only needs a redraw once the mouse reaches another tile.
+                        if not isinstance(event, tcod.event.MouseMotion):
+                            dirty = True
+                        handler.handle_event(event)
                 except exceptions.ExitToMainMenu:
                     if not isinstance(handler.engine, MainMenuEngine) and SETTINGS['auto_save']:
                         save_game(handler, f'exitsave_{abs(hash(handler.engine)) % (10 ** 5)}.sav')
                     handler = MainMenuEngine().event_handler
+                    dirty = True
                 except Exception: # Handle exceptions in game.
                     traceback.print_exc() # Print error to stderr
                     # Then print to the message log.
                     if not isinstance(handler.engine, MainMenuEngine):
                         handler.message(traceback.format_exc(), color.error)
+                    dirty = True
+                if getattr(handler.engine, 'mouse_location', None) != mouse_location:
+                    dirty = True
         except exceptions.QuitWithoutSaving:
             raise
         except SystemExit: # Save and Quit
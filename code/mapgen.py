@@ -77,7 +77,7 @@ class RectangularRoom(Room):
         while True:
             loc = random.randint(1, dungeon.width-1), random.randint(1, dungeon.height-1)
             
-            if dungeon.tiles[*loc]['walkable'] and not any(sprite.x == loc[0] and sprite.y == loc[1] for sprite in dungeon.sprites):
+            if dungeon.tiles[*loc]['walkable'] and not dungeon.get_sprites_at_location(*loc):
                 sprite.place(*loc, dungeon)
                 break
                 
@@ -98,7 +98,7 @@ class RectangularRoom(Room):
             if (
             ((dungeon.tiles[tuple(np.add(point, (0, 1)))] == tile_types.wall and dungeon.tiles[tuple(np.add(point, (0, -1)))] == tile_types.wall) or
             (dungeon.tiles[tuple(np.add(point, (1, 0)))] == tile_types.wall and dungeon.tiles[tuple(np.add(point, (-1, 0)))] == tile_types.wall)) and
-            not any(sprite.x == point[0] and sprite.y == point[1] for sprite in dungeon.sprites)
+            not dungeon.get_sprites_at_location(*point)
             ):
                 if random.random() < chance:
                     new_door: Door = door.spawn(dungeon, *point).entity
@@ -147,7 +147,7 @@ def place_sprites(
         x = random.randint(room.x1 + 1, room.x2 - 1)
         y = random.randint(room.y1 + 1, room.y2 - 1)
         
-        if not any(sprite.x == x and sprite.y == y for sprite in dungeon.sprites):
+        if not dungeon.get_sprites_at_location(x, y):
             new_sprite.place(x, y, dungeon)
         
 def tunnel_between(
@@ -244,4 +244,5 @@ def generate_dungeon_floor(
     for room in rooms:
         room.place_doors(dungeon)
     
+    dungeon.refresh_layers() # Tiles were dug while sprites were already being placed.
     return dungeon
@@ -1,10 +1,12 @@
 from __future__ import annotations
-from typing import List, Reversible, Tuple, Optional, Iterable
-import textwrap
+from typing import Deque, Dict, List, Reversible, Tuple, Optional, Iterable
+from collections import deque
+import itertools, json, os, textwrap, uuid
 
 import tcod
 
 import color
+from config import SETTINGS
 
 
 class Message:
@@ -12,6 +14,9 @@ class Message:
         self.plain_text = text
         self.fg = fg
         self.count = 1
+        
+    # Width -> (count when wrapped, wrapped lines). Class default so messages from older saves get one.
+    _wrapped: Optional[Dict[int, Tuple[int, List[str]]]] = None
 
     @property
     def full_text(self) -> str:
@@ -19,10 +24,151 @@ class Message:
         if self.count > 1:
             return f"{self.plain_text} (x{self.count})"
         return self.plain_text
+    
+    def wrap(self, width: int) -> List[str]:
+        """ Return `full_text` wrapped to `width`. Cached until the count changes. """
+        if self._wrapped is None:
+            self._wrapped = {}
+        cached = self._wrapped.get(width)
+        if cached is None or cached[0] != self.count:
+            cached = self._wrapped[width] = self.count, list(MessageLog.wrap(self.full_text, width))
+        return cached[1]
+    
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop('_wrapped', None)
+        return state
+    
+    def to_json(self) -> str:
+        return json.dumps({'text': self.plain_text, 'fg': list(self.fg), 'count': self.count})
+    
+    @classmethod
+    def from_json(cls, line: str) -> Message:
+        data = json.loads(line)
+        message = cls(data['text'], tuple(data['fg']))
+        message.count = data['count']
+        return message
 
 class MessageLog:
-    def __init__(self) -> None:
-        self.messages: List[Message] = []
+    """
+    The most recent messages, at most `capacity` of them (the `message_log_size` setting).
+    
+    Older messages are spilled to an append-only history file, one JSON line each, so long sessions don't grow
+    the log kept in memory or the saves. They are written `spill_batch` at a time and whenever the log is saved.
+    `get_messages` reads across both for the history viewer.
+    """
+    history_dir = 'data/user_data/message_history'
+    spill_batch = 100
+    
+    def __init__(self, capacity: Optional[int] = None) -> None:
+        if capacity is None:
+            capacity = SETTINGS.get('message_log_size', 1000)
+        self.messages: Deque[Message] = deque(maxlen=capacity)
+        
+        self.history_file = os.path.join(self.history_dir, f'{uuid.uuid4().hex}.log')
+        self.spilled = 0 # Messages in the history file.
+        self.spilled_bytes = 0
+        self._offsets: Optional[List[int]] = None # Where each spilled message starts, read on demand.
+        self._pending: List[Message] = [] # Spilled messages not written to the history file yet.
+        self._shared = False # Whether a save refers to the history file, which then must be kept.
+        
+    def __len__(self) -> int:
+        """ Number of messages, including the spilled ones. """
+        return self.spilled + len(self._pending) + len(self.messages)
+    
+    def __getstate__(self) -> dict:
+        # The save refers to the history file, so it has to hold every spilled message.
+        self.flush()
+        self._shared = True
+        state = self.__dict__.copy()
+        state['_offsets'] = None
+        return state
+    
+    def __setstate__(self, state: dict) -> None:
+        # Older saves kept every message in a list.
+        messages = state['messages']
+        if not isinstance(messages, deque):
+            state['messages'] = deque(maxlen=SETTINGS.get('message_log_size', 1000))
+            state.setdefault('history_file', os.path.join(self.history_dir, f'{uuid.uuid4().hex}.log'))
+            state.setdefault('spilled', 0)
+            state.setdefault('spilled_bytes', 0)
+            state['_offsets'] = None
+        state.setdefault('_pending', [])
+        state['_shared'] = True
+        self.__dict__.update(state)
+        if not isinstance(messages, deque):
+            for message in messages:
+                self._append(message)
+    
+    def _append(self, message: Message) -> None:
+        if self.messages.maxlen is not None and len(self.messages) == self.messages.maxlen:
+            self._spill(self.messages.popleft())
+        self.messages.append(message)
+        
+    def _spill(self, message: Message) -> None:
+        self._pending.append(message)
+        if len(self._pending) >= self.spill_batch:
+            self.flush()
+            
+    def flush(self) -> None:
+        """ Append the spilled messages still held in memory to the history file. """
+        if not self._pending:
+            return
+        os.makedirs(self.history_dir, exist_ok=True)
+        if os.path.exists(self.history_file) and os.path.getsize(self.history_file) != self.spilled_bytes:
+            # Another save of this game has written past us, carry on in a copy of our part of it.
+            history_file = os.path.join(self.history_dir, f'{uuid.uuid4().hex}.log')
+            with open(self.history_file, 'rb') as old, open(history_file, 'wb') as new:
+                new.write(old.read(self.spilled_bytes))
+            self.history_file = history_file
+            self._shared = False
+        
+        lines = [(message.to_json() + '\n').encode('utf-8') for message in self._pending]
+        with open(self.history_file, 'ab') as f:
+            f.write(b''.join(lines))
+        for line in lines:
+            if self._offsets is not None:
+                self._offsets.append(self.spilled_bytes)
+            self.spilled_bytes += len(line)
+        self.spilled += len(lines)
+        self._pending.clear()
+        
+    def clear(self) -> None:
+        """ Forget every message, including the spilled history. """
+        self.messages.clear()
+        self._pending.clear()
+        if self._shared:
+            # A save still reads its history from the file, so leave it and start another.
+            self.history_file = os.path.join(self.history_dir, f'{uuid.uuid4().hex}.log')
+            self._shared = False
+        elif os.path.exists(self.history_file):
+            os.remove(self.history_file)
+        self.spilled = 0
+        self.spilled_bytes = 0
+        self._offsets = None
+        
+    def get_messages(self, start: int, stop: int) -> List[Message]:
+        """ Return messages `start` to `stop` counting from the first ever, reading spilled ones from disk. """
+        self.flush()
+        start, stop = max(start, 0), min(stop, len(self))
+        messages: List[Message] = []
+        if start < self.spilled:
+            if self._offsets is None:
+                self._offsets = []
+                offset = 0
+                with open(self.history_file, 'rb') as f:
+                    for line in f:
+                        if offset >= self.spilled_bytes:
+                            break
+                        self._offsets.append(offset)
+                        offset += len(line)
+            with open(self.history_file, 'rb') as f:
+                f.seek(self._offsets[start])
+                for _ in range(start, min(stop, self.spilled)):
+                    messages.append(Message.from_json(f.readline().decode('utf-8')))
+        first_in_memory = max(start - self.spilled, 0)
+        messages.extend(itertools.islice(self.messages, first_in_memory, max(stop - self.spilled, 0)))
+        return messages
 
     def add_message(
         self, text: str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True,
@@ -35,15 +181,14 @@ class MessageLog:
         if stack and self.messages and text == self.messages[-1].plain_text:
             self.messages[-1].count += 1
         else:
-            self.messages.append(Message(text, fg))
+            self._append(Message(text, fg))
             
     def input(
         self, text: Optional[str] = None, fg: Tuple[int, int, int] = color.white
     ) -> None:
-        self.messages.append(Message(text, fg))
+        self._append(Message(text, fg))
         
     
-
     def render(
         self, console: tcod.console.Console, x: int, y: int, width: int, height: int,
     ) -> None:
@@ -78,7 +223,7 @@ class MessageLog:
         y_offset = height - 1
 
         for message in reversed(messages):
-            for line in reversed(list(cls.wrap(message.full_text, width))):
+            for line in reversed(message.wrap(width)):
                 console.print(x=x, y=y + y_offset, string=line, fg=message.fg)
                 y_offset -= 1
                 if y_offset < 0:
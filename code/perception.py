@@ -0,0 +1,64 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import numpy as np
+from tcod.map import compute_fov
+
+from sprite import Actor
+
+if TYPE_CHECKING:
+    from world import GameMap
+
+class Perception:
+    """
+    What each awake actor on a map can see this turn.
+
+    FOV is computed once per actor over a window the size of its sight radius, then shared by the AI, aggro
+    spreading and targeting instead of every actor recomputing it over the whole map.
+    """
+
+    def __init__(self, gamemap: GameMap, radius: int = 8) -> None:
+        self.gamemap = gamemap
+        self.radius = radius
+
+        # Actor -> (window origin x, window origin y, visible tiles in the window)
+        self._views: Dict[Actor, Tuple[int, int, np.ndarray]] = {}
+
+    def view(self, actor: Actor) -> Tuple[int, int, np.ndarray]:
+        """ Return `actor`'s view as (origin x, origin y, visible), computing it if needed. """
+        view = self._views.get(actor)
+        if view is None:
+            view = self._views[actor] = self._compute_view(actor)
+        return view
+
+    def _compute_view(self, actor: Actor) -> Tuple[int, int, np.ndarray]:
+        x1, y1 = max(actor.x - self.radius, 0), max(actor.y - self.radius, 0)
+        x2 = min(actor.x + self.radius + 1, self.gamemap.width)
+        y2 = min(actor.y + self.radius + 1, self.gamemap.height)
+
+        visible = compute_fov(
+            self.gamemap.transparent[x1:x2, y1:y2],
+            (actor.x - x1, actor.y - y1),
+            radius=self.radius,
+        )
+        return x1, y1, visible
+
+    def can_see_tile(self, viewer: Actor, x: int, y: int) -> bool:
+        """ Return True if `viewer` can see tile (`x`, `y`). """
+        x1, y1, visible = self.view(viewer)
+        x -= x1
+        y -= y1
+        return 0 <= x < visible.shape[0] and 0 <= y < visible.shape[1] and bool(visible[x, y])
+
+    def can_see(self, viewer: Actor, target: Actor) -> bool:
+        """ Return True if `viewer` can see `target`. """
+        return self.can_see_tile(viewer, target.x, target.y)
+
+    def visible_actors(self, viewer: Actor) -> List[Actor]:
+        """ Return the living actors, other than `viewer`, that `viewer` can see. """
+        x1, y1, visible = self.view(viewer)
+        x2, y2 = x1 + visible.shape[0] - 1, y1 + visible.shape[1] - 1
+        return [
+            sprite for sprite in self.gamemap.sprite_index.in_rect(x1, y1, x2, y2)
+            if sprite is not viewer and isinstance(sprite, Actor) and sprite.is_alive and visible[sprite.x - x1, sprite.y - y1]
+        ]
@@ -0,0 +1,125 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Optional
+
+import copy, importlib
+
+
+class Prototyped:
+    """
+    Mixin for objects spawned from a registered prototype.
+
+    Instances share the prototype's values for the attributes named in `prototype_shared` instead of holding
+    copies, and only those that differ are copied or pickled. Shared values are copy-on-write: lists, dicts and
+    sets are frozen when the prototype is registered, so changing one in place raises. Assign a new value, or
+    call `own` for a copy that can be changed in place.
+    """
+
+    # Attributes whose values can be shared with the prototype.
+    prototype_shared: tuple = ()
+    # Prototyped attributes registered along with the object, like an item's effect.
+    prototype_parts: tuple = ()
+    # Set on prototypes by `PrototypeRegistry.register` and carried over to everything spawned from them.
+    prototype_id: Optional[str] = None
+
+    @property
+    def prototype(self) -> Optional[Prototyped]:
+        return PROTOTYPES.get(self.prototype_id) if self.prototype_id is not None else None
+
+    def instantiate(self: Prototyped) -> Prototyped:
+        """ Return a new instance of this prototype, sharing its `prototype_shared` values. """
+        return copy.deepcopy(self)
+
+    def own(self, name: str):
+        """ Give this instance its own copy of the shared value `name` so it can be changed in place. """
+        value = self.__dict__[name]
+        thaw = _THAW.get(type(value))
+        if thaw is not None and self.prototype is not self:
+            value = thaw(value)
+            setattr(self, name, value)
+        return value
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        prototype = self.prototype
+        if prototype is not None:
+            for name in self.prototype_shared:
+                if name in state and state[name] is prototype.__dict__.get(name):
+                    del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        prototype_id = state.get('prototype_id')
+        if prototype_id is not None:
+            shared = vars(PROTOTYPES.get(prototype_id))
+            for name in self.prototype_shared:
+                if name not in state and name in shared:
+                    state[name] = shared[name]
+        self.__dict__.update(state)
+
+
+class FrozenDict(dict):
+    """ A dict shared with a prototype, which raises instead of being changed in place. """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('This value is shared with a prototype, call `own` to get a copy that can be changed.')
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+class FrozenList(tuple):
+    """ A list shared with a prototype. A tuple, so it has no methods that change it. """
+    __slots__ = ()
+
+# Mutable types of shared values -> their frozen types, and back for `own`.
+_FREEZE = {dict: FrozenDict, list: FrozenList, set: frozenset}
+_THAW = {frozen: mutable for mutable, frozen in _FREEZE.items()}
+
+
+class PrototypeRegistry:
+    """
+    Prototypes by ID.
+
+    IDs of prototype parts are the owner's ID and the attribute name joined by a dot, e.g. 'Sword.effect'. Modules
+    in `sources` define prototypes when imported and are imported the first time an unknown ID is looked up, so
+    saves can be loaded before the data modules are.
+    """
+
+    def __init__(self, sources: Iterable[str] = ()) -> None:
+        self.sources = tuple(sources)
+        self._prototypes: Dict[str, Prototyped] = {}
+
+    def __contains__(self, prototype_id: str) -> bool:
+        return prototype_id in self._prototypes
+
+    def register(self, prototype_id: str, prototype: Prototyped) -> Prototyped:
+        if prototype_id in self._prototypes and self._prototypes[prototype_id] is not prototype:
+            raise KeyError(f'Prototype {prototype_id} is already registered.')
+        self._prototypes[prototype_id] = prototype
+        prototype.prototype_id = prototype_id
+        for name in prototype.prototype_shared:
+            value = prototype.__dict__.get(name)
+            freeze = _FREEZE.get(type(value))
+            if freeze is not None:
+                setattr(prototype, name, freeze(value))
+        for name in prototype.prototype_parts:
+            part = getattr(prototype, name, None)
+            if isinstance(part, Prototyped):
+                self.register(f'{prototype_id}.{name}', part)
+        return prototype
+
+    def get(self, prototype_id: str) -> Prototyped:
+        prototype = self._prototypes.get(prototype_id)
+        if prototype is None:
+            for source in self.sources:
+                importlib.import_module(source)
+            prototype = self._prototypes[prototype_id]
+        return prototype
+
+    def spawn(self, prototype_id: str) -> Prototyped:
+        """ Return a new instance of the prototype `prototype_id`. """
+        return self.get(prototype_id).instantiate()
+
+
+PROTOTYPES = PrototypeRegistry(sources=('item_data', 'sprite_data'))
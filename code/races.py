@@ -57,6 +57,10 @@ class BaseRace():
         self.elderly_age = elderly_age
         
         self.resistances = {elem: 0 for elem in game_types.ElementTypes.elements()} | resistances
+        
+    def __reduce__(self):
+        # Every character shares the races in RACES, so only the name is saved.
+        return get_race, (self.name,)
 
 class Human(BaseRace):
     def __init__(self) -> None:
@@ -117,4 +121,7 @@ class Tiefling(BaseRace):
             resistances={game_types.ElementTypes.FIRE: 50}
             )
 
-RACES: List[BaseRace] = [Human(), Elf(), Dwarf(), Tiefling()]
\ No newline at end of file
+RACES: List[BaseRace] = [Human(), Elf(), Dwarf(), Tiefling()]
+
+def get_race(name: str) -> BaseRace:
+    return next(race for race in RACES if race.name == name)
\ No newline at end of file
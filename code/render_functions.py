@@ -1,7 +1,8 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Tuple, List
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, Optional, Tuple, List
 
 import color, math, time, tcod
+from functools import lru_cache
 
 import numpy as np
 
@@ -19,7 +20,7 @@ def get_names_at_location(x: int, y: int, game_map: GameMap) -> list[str]:
     elif not game_map.in_bounds(x, y) or not game_map.visible[x, y]:
         return []
     
-    names = [sprite.entity.display_name.title() for sprite in game_map.sprites - {game_map.engine.player} if sprite.x == x and sprite.y == y]
+    names = [sprite.entity.display_name.title() for sprite in game_map.get_sprites_at_location(x, y) if sprite is not game_map.engine.player]
     
     return names
 
@@ -59,6 +60,52 @@ def render_names_at_mouse_location(
 
 resource_colors = {'hp': (color.hp_bar_filled, color.hp_bar_empty), 'mp': (color.mp_bar_filled, color.mp_bar_empty), 'sp': (color.sp_bar_filled, color.sp_bar_empty)}
 
+class CachedLayer:
+    """
+    Offscreen console for UI that rarely changes.
+    
+    `render` only calls `draw` when the key (or size) differs from the last call, otherwise the console drawn
+    last time is blitted as is.
+    """
+    def __init__(self) -> None:
+        self._layer: Optional[tcod.console.Console] = None
+        self._key: Hashable = None
+        
+    def render(
+        self, console: Console, x: int, y: int, width: int, height: int, key: Hashable, draw: Callable[[Console], None],
+    ) -> None:
+        key = (width, height, key)
+        if self._layer is None or key != self._key:
+            self._layer = tcod.console.Console(width, height, order='F')
+            draw(self._layer)
+            self._key = key
+        self._layer.blit(console, dest_x=x, dest_y=y)
+        
+# Row the HUD starts on, just under the map.
+HUD_TOP = 43
+
+_hud_chrome = CachedLayer()
+
+def render_hud_chrome(console: Console, player_name: str) -> None:
+    """ Draw the HUD separators, frame lines and name box. Only redrawn when the name, UI colours or size change. """
+    _hud_chrome.render(
+        console, x=0, y=HUD_TOP, width=console.width, height=console.height-HUD_TOP,
+        key=(player_name, tuple(color.ui_color), tuple(color.ui_text_color)),
+        draw=lambda layer: _draw_hud_chrome(layer, player_name),
+    )
+    
+def _draw_hud_chrome(layer: Console, player_name: str) -> None:
+    layer.draw_rect(x=0, y=0, width=layer.width, height=1, ch=ord('─'), fg=color.ui_color)
+    layer.print(x=1, y=0, string=f'┤{"".join([" "]*len(player_name))}├', fg=color.ui_color)
+    layer.print(x=2, y=0, string=f'{player_name}', fg=color.ui_text_color)
+    
+    layer.print(x=20, y=0, string='┬', fg=color.ui_color)
+    layer.draw_rect(x=20, y=1, width=1, height=layer.height-1, ch=ord('│'), fg=color.ui_color)
+    layer.print(x=layer.width-20, y=0, string='┬', fg=color.ui_color)
+    layer.draw_rect(x=layer.width-20, y=1, width=1, height=layer.height-1, ch=ord('│'), fg=color.ui_color)
+
+_resource_bars: Dict[Tuple[str, int, int], CachedLayer] = {}
+
 def render_resource_bar(
     x: int,
     y: int,
@@ -69,19 +116,39 @@ def render_resource_bar(
     total_width: int,
     height: int = 1
 ) -> None:
-    bar_width = int(float(current_val) / maximum_val * total_width)
+    """ Draw a resource bar. Each bar is cached and only redrawn when its values change. """
+    layer = _resource_bars.setdefault((resource, x, y), CachedLayer())
+    layer.render(
+        console, x=x, y=y, width=total_width, height=height,
+        key=(resource, current_val, maximum_val),
+        draw=lambda bar: _draw_resource_bar(bar, resource, current_val, maximum_val),
+    )
+
+def _draw_resource_bar(console: Console, resource: str, current_val: int, maximum_val: int) -> None:
+    bar_width = int(float(current_val) / maximum_val * console.width)
     
-    console.draw_rect(x=x, y=y, width=total_width, height=height, ch=1, bg=resource_colors[resource][1])
+    console.draw_rect(x=0, y=0, width=console.width, height=console.height, ch=1, bg=resource_colors[resource][1])
     
     if bar_width > 0:
         console.draw_rect(
-            x=x, y=y, width=bar_width, height=height, ch=1, bg=resource_colors[resource][0]
+            x=0, y=0, width=bar_width, height=console.height, ch=1, bg=resource_colors[resource][0]
         )
         
     console.print(
-        x=x+1, y=y, string=f'{resource.upper()}: {current_val}/{maximum_val}', fg=color.bar_text
+        x=1, y=0, string=f'{resource.upper()}: {current_val}/{maximum_val}', fg=color.bar_text
     )
 
+@lru_cache(maxsize=None)
+def _load_tileset(path: str) -> tcod.tileset.Tileset:
+    return tcod.tileset.load_tilesheet(path, 16, 16, tcod.tileset.CHARMAP_CP437)
+
+@lru_cache(maxsize=256)
+def glyph_image(char: str, fg: Tuple[int, int, int], tileset_file: str) -> tcod.image.Image:
+    """ The top left 10x10 pixels of `char`'s tile in `tileset_file`, drawn in `fg` on black, for the character previews. """
+    alpha = _load_tileset(tileset_file).get_tile(ord(char))[:10, :10, 3]
+    pixels = np.where((alpha == 255)[:, :, None], np.array(fg, dtype=np.uint8), np.uint8(0))
+    return tcod.image.Image.from_array(pixels.astype(np.uint8))
+
 def draw_circle(console: Console, char: str, x: int, y: int, radius: int, fg: Tuple[int, int, int] | None = None) -> List[Tuple[int, int]]:
     points: List[Tuple[int, int]]= []
     if not fg:
@@ -0,0 +1,412 @@
+"""
+Save file format.
+
+A save starts with `MAGIC`, a format version byte, the length of the header as a little endian uint32 and the
+header itself as uncompressed JSON. The header holds what the load menu shows, so previews never touch the rest.
+
+From version 2 the header is followed by a table of sections, stored the same way, and the sections. Each
+section is the lzma compressed pickle of one part of the game: the engine, the player, the message log and every
+floor. Pickles refer to the other sections' objects by section name rather than including them, so a section can
+be loaded on its own. Loading only unpickles the current floor, the others are kept compressed as `UnloadedFloor`s
+in `GameLocation.maps` until the stairs lead to them, and are copied as they are into later saves.
+
+Saves are written to a temporary file that then replaces the old one, so a save is never left half written.
+
+Version 1 saves hold the compressed pickle of the whole `Engine` after the header, and files written before
+headers existed are just that pickle. Both are still read, their previews come from loading them in full.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import importlib, io, json, lzma, os, pickle, struct, tempfile, time, traceback
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from world import GameMap
+
+MAGIC = b'RLSAVE'
+VERSION = 2
+_LENGTH = struct.Struct('<I')
+SAVE_DIR = 'data/user_data/save_data'
+
+
+def make_header(engine: Engine) -> Dict[str, Any]:
+    """ Summary of `engine` shown by the load menu. """
+    player = engine.player
+    character = player.entity
+    if engine.created is None:
+        engine.created = time.time()
+    return {
+        'name': player.name,
+        'race': character.race.name,
+        'job': character.job.name,
+        'level': character.level,
+        'turn_count': engine.turn_count,
+        'floor': engine.game_location.current_floor,
+        'created': engine.created,
+        'saved': time.time(),
+        'char': player.char,
+        'color': list(player.color),
+    }
+
+
+class UnloadedFloor:
+    """ A floor of a loaded save that hasn't been unpickled yet. `GameLocation` calls `load` when it's needed. """
+
+    def __init__(self, reader: SaveReader, name: str, floor_level: int) -> None:
+        self.reader = reader
+        self.name = name
+        self.floor_level = floor_level
+
+    @property
+    def data(self) -> bytes:
+        """ The compressed section, for writing into a new save as it is. """
+        return self.reader.sections[self.name][1]
+
+    def load(self) -> GameMap:
+        return self.reader.load_section(self.name)
+
+
+def _qualified_name(cls: type) -> str:
+    return f'{cls.__module__}:{cls.__qualname__}'
+
+def _import_class(name: str) -> type:
+    module, qualname = name.split(':')
+    obj = importlib.import_module(module)
+    for attr in qualname.split('.'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+class _SectionPickler(pickle.Pickler):
+    """ Pickles the state of a section's object, referring to every section object, its own included, by name. """
+
+    def __init__(self, file, names: Dict[int, str]) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.names = names
+
+    def persistent_id(self, obj: object) -> Optional[str]:
+        return self.names.get(id(obj))
+
+
+def _compress(data: bytes) -> bytes:
+    # A dictionary bigger than the data compresses no better, it only costs time and memory on both ends.
+    dict_size = max(1 << 16, 1 << (len(data) - 1).bit_length())
+    return lzma.compress(data, filters=[{'id': lzma.FILTER_LZMA2, 'preset': 6, 'dict_size': dict_size}])
+
+def _split_sections(engine: Engine) -> Dict[str, object]:
+    """ The objects saved as their own sections, by section name. """
+    roots: Dict[str, object] = {'engine': engine, 'player': engine.player, 'message_log': engine.message_log}
+    for gamemap in engine.game_location.maps:
+        roots[f'floor:{gamemap.floor_level}'] = gamemap
+    return roots
+
+class SaveSnapshot:
+    """
+    A game pickled into save sections, ready to be compressed and written.
+
+    Only the pickling has to happen on the game thread, `write` can run on another one while the game goes on.
+    Floors other than the current one can't change, so their pickles are kept on the `GameMap` and reused until
+    the player goes back to them.
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.header = make_header(engine)
+        roots = _split_sections(engine)
+        names = {id(root): name for name, root in roots.items()}
+        self.current = names[id(engine.game_map)]
+        
+        self.classes: Dict[str, str] = {}
+        self.payloads: Dict[str, bytes] = {}
+        self.compressed: Dict[str, bytes] = {}
+        for name, root in roots.items():
+            if isinstance(root, UnloadedFloor):
+                self.classes[name] = root.reader.sections[root.name][0]
+                self.compressed[name] = root.data
+                continue
+            self.classes[name] = _qualified_name(type(root))
+            payload = root.save_payload if name.startswith('floor:') and name != self.current else None
+            if payload is None:
+                buffer = io.BytesIO()
+                _SectionPickler(buffer, names).dump(root.__getstate__())
+                payload = buffer.getvalue()
+                if name.startswith('floor:') and name != self.current:
+                    root.save_payload = payload
+            self.payloads[name] = payload
+        self.order = list(roots)
+
+    def write(self, path: str) -> Dict[str, Any]:
+        """ Compress the sections and write them to `path`, replacing it only once the file is complete. """
+        # lzma releases the GIL, so the sections are compressed side by side.
+        with ThreadPoolExecutor(max_workers=min(len(self.payloads), os.cpu_count() or 1) or 1) as pool:
+            compressed = dict(zip(self.payloads, pool.map(_compress, self.payloads.values())))
+        compressed.update(self.compressed)
+        
+        table = {'current': self.current, 'sections': []}
+        offset = 0
+        for name in self.order:
+            table['sections'].append([name, self.classes[name], offset, len(compressed[name])])
+            offset += len(compressed[name])
+        
+        directory = os.path.dirname(path) or '.'
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MAGIC + bytes([VERSION]))
+                for block in (self.header, table):
+                    data = json.dumps(block).encode('utf-8')
+                    f.write(_LENGTH.pack(len(data)) + data)
+                for name in self.order:
+                    f.write(compressed[name])
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return self.header
+
+def write_save(path: str, engine: Engine) -> Dict[str, Any]:
+    """ Save `engine` to `path` with a header, and return the header. """
+    return SaveSnapshot(engine).write(path)
+
+def _read_block(f) -> Any:
+    length, = _LENGTH.unpack(f.read(_LENGTH.size))
+    return json.loads(f.read(length).decode('utf-8'))
+
+def _read_header(f) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """ Read the version and header of the open save `f`, leaving it after the header. (0, None) for headerless saves. """
+    if f.read(len(MAGIC)) != MAGIC:
+        f.seek(0)
+        return 0, None
+    version = f.read(1)[0]
+    return version, _read_block(f)
+
+def read_header(path: str) -> Dict[str, Any]:
+    """ Return the header of the save at `path` without loading the game. """
+    with open(path, 'rb') as f:
+        _, header = _read_header(f)
+    if header is None:
+        # Saves from before headers, the whole game has to be loaded once to preview them.
+        engine = read_save(path)
+        if engine.created is None:
+            engine.created = os.path.getctime(path)
+        header = make_header(engine)
+        header['saved'] = os.path.getmtime(path)
+    return header
+
+def read_save(path: str) -> Engine:
+    """ Load the `Engine` saved at `path`, leaving floors other than the current one unloaded. """
+    with open(path, 'rb') as f:
+        version, _ = _read_header(f)
+        if version < 2:
+            return pickle.loads(lzma.decompress(f.read()))
+        reader = SaveReader(_read_block(f), f.read())
+    return reader.load()
+
+
+class _SectionUnpickler(pickle.Unpickler):
+    def __init__(self, file, resolve: Callable[[str], object]) -> None:
+        super().__init__(file)
+        self.resolve = resolve
+
+    def persistent_load(self, name: str) -> object:
+        return self.resolve(name)
+
+
+class SaveReader:
+    """ The sections of a version 2 save, unpickled on demand. Only the data of unloaded sections is kept. """
+
+    def __init__(self, table: Dict[str, Any], body: bytes) -> None:
+        self.current: str = table['current']
+        # Section name -> (class name, compressed data)
+        self.sections: Dict[str, Tuple[str, bytes]] = {
+            name: (class_name, body[offset:offset+length]) for name, class_name, offset, length in table['sections']
+        }
+        self.roots: Dict[str, object] = {}
+
+    def _root(self, name: str) -> object:
+        """ The object of section `name`, an empty instance until its section is unpickled. """
+        root = self.roots.get(name)
+        if root is None:
+            if name.startswith('floor:'):
+                # Other floors are only loaded when asked for, so only `GameLocation.maps` should refer to them.
+                root = UnloadedFloor(self, name, int(name.removeprefix('floor:')))
+            else:
+                root = self._new_root(name)
+            self.roots[name] = root
+        return root
+
+    def _reference(self, name: str) -> object:
+        """
+        Like `_root`, for every section but the engine's. Only `GameLocation.maps` in the engine section may hold an
+        unloaded floor. Anything else referring to one is a sprite that left that floor in a save from before
+        `GameMap.remove_sprite` cleared `parent`, so it gets None instead of a placeholder it would then use as a map.
+        """
+        if not name.startswith('floor:'):
+            return self._root(name)
+        root = self.roots.get(name)
+        return None if isinstance(root, UnloadedFloor) else root
+
+    def _new_root(self, name: str) -> object:
+        cls = _import_class(self.sections[name][0])
+        root = self.roots[name] = cls.__new__(cls)
+        return root
+
+    def _unpickle(self, name: str, root: object) -> None:
+        _, data = self.sections.pop(name)
+        resolve = self._root if name == 'engine' else self._reference
+        state = _SectionUnpickler(io.BytesIO(lzma.decompress(data)), resolve).load()
+        if hasattr(root, '__setstate__'):
+            root.__setstate__(state)
+        else:
+            root.__dict__.update(state)
+
+    def load_section(self, name: str) -> object:
+        """ Load the unloaded floor section `name`. """
+        root = self._new_root(name)
+        self._unpickle(name, root)
+        return root
+
+    def load(self) -> Engine:
+        """ Load the engine, player, message log and current floor. """
+        self._new_root(self.current)
+        for name in ('engine', 'player', 'message_log', self.current):
+            self._unpickle(name, self._root(name))
+        return self.roots['engine']
+
+
+class SaveCatalogue:
+    """
+    Index of the saves in `directory`, for the menus.
+
+    The directory is only scanned again when its modification time changes, and saves written or deleted through
+    the catalogue are recorded directly. Headers are read the first time a save is previewed and kept until the
+    file is modified.
+    """
+
+    def __init__(self, directory: str = SAVE_DIR) -> None:
+        self.directory = directory
+        self._mtimes: Dict[str, int] = {} # File name -> modification time in ns.
+        self._headers: Dict[str, tuple] = {} # File name -> (modification time, header).
+        self._sorted: Dict[str, List[str]] = {} # Sort key -> file names, built on demand.
+        self._dir_mtime: Optional[int] = None
+        self._writer: Optional[ThreadPoolExecutor] = None # Started by the first background save.
+        self._failures: List[Tuple[str, BaseException]] = [] # Failed background saves not yet taken by `failures`.
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    def refresh(self, force: bool = False) -> None:
+        """ Scan the directory again if it changed since the last scan. """
+        try:
+            dir_mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime = None
+        if dir_mtime == self._dir_mtime and not force:
+            return
+        self._dir_mtime = dir_mtime
+        self._mtimes = {}
+        if dir_mtime is not None:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.sav') and entry.is_file():
+                        self._mtimes[entry.name] = entry.stat().st_mtime_ns
+        self._headers = {name: cached for name, cached in self._headers.items() if self._mtimes.get(name) == cached[0]}
+        self._sorted = {}
+
+    def __contains__(self, filename: str) -> bool:
+        self.refresh()
+        return filename in self._mtimes
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._mtimes)
+
+    def sorted(self, key: str = 'saved') -> List[str]:
+        """ File names of the saves, the most recent first for 'saved' or alphabetical for 'name'. """
+        self.refresh()
+        names = self._sorted.get(key)
+        if names is None:
+            if key == 'saved':
+                names = sorted(self._mtimes, key=self._mtimes.__getitem__, reverse=True)
+            elif key == 'name':
+                names = sorted(self._mtimes, key=str.lower)
+            else:
+                raise ValueError(f'Unknown sort key {key}.')
+            self._sorted[key] = names
+        return names
+
+    def page(self, start: int, count: int, key: str = 'saved') -> List[str]:
+        return self.sorted(key)[start:start+count]
+
+    def latest(self, prefix: str = '') -> Optional[str]:
+        """ File name of the most recent save starting with `prefix`, if any. """
+        return next((name for name in self.sorted() if name.startswith(prefix)), None)
+
+    def header(self, filename: str) -> Dict[str, Any]:
+        self.refresh()
+        mtime = self._mtimes[filename]
+        cached = self._headers.get(filename)
+        if cached is None or cached[0] != mtime:
+            cached = self._headers[filename] = mtime, read_header(self.path(filename))
+        return cached[1]
+
+    def save(self, filename: str, engine: Engine) -> None:
+        """ Save `engine` as `filename` and record it. """
+        self.refresh()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(filename)
+        header = write_save(path, engine)
+        self._record(filename, header)
+
+    def save_in_background(self, filename: str, engine: Engine) -> Future:
+        """
+        Save `engine` as `filename`, only pickling it here and leaving compression and writing to a worker thread.
+        The catalogue picks the file up from the directory once it is written.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot = SaveSnapshot(engine)
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='save')
+        future = self._writer.submit(snapshot.write, self.path(filename))
+        future.add_done_callback(lambda future: self._note_failure(filename, future))
+        return future
+
+    def failures(self) -> List[Tuple[str, BaseException]]:
+        """ Take the (file name, exception) of every background save that failed since the last call. """
+        failures = []
+        while self._failures:
+            failures.append(self._failures.pop(0))
+        return failures
+
+    def _note_failure(self, filename: str, future: Future) -> None:
+        """ Runs on the writer thread once a background save is done. """
+        error = future.exception()
+        if error is not None:
+            traceback.print_exception(error)
+            self._failures.append((filename, error))
+
+    def _record(self, filename: str, header: Optional[Dict[str, Any]]) -> None:
+        """ Note that `filename` was written, or deleted if `header` is None, without scanning again. """
+        if header is None:
+            self._mtimes.pop(filename, None)
+            self._headers.pop(filename, None)
+        else:
+            mtime = os.stat(self.path(filename)).st_mtime_ns
+            self._mtimes[filename] = mtime
+            self._headers[filename] = mtime, header
+        self._sorted = {}
+        self._dir_mtime = os.stat(self.directory).st_mtime_ns
+
+    def load(self, filename: str) -> Engine:
+        return read_save(self.path(filename))
+
+    def delete(self, filename: str) -> None:
+        self.refresh()
+        os.remove(self.path(filename))
+        self._record(filename, None)
+
+
+SAVES = SaveCatalogue()
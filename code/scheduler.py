@@ -0,0 +1,75 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import heapq
+
+from actions import Action
+
+if TYPE_CHECKING:
+    from sprite import Actor
+
+class TurnScheduler:
+    """
+    Priority queue of actors keyed by the time they next get to act.
+
+    Time is measured in the same units as `Action.base_cost`. After acting, an actor is rescheduled `cost` later, so
+    cheap actions let it act again sooner. Only actors whose time has come are popped, the rest are never
+    touched. Removed actors are cancelled in place and skipped when they reach the front of the queue.
+    """
+
+    def __init__(self, actors: Iterable[Actor] = (), time: int = 0) -> None:
+        self.time = time
+
+        # [time, insertion order, actor] with the actor set to None once cancelled.
+        self._queue: List[list] = []
+        self._entries: Dict[Actor, list] = {}
+        self._order = 0
+
+        for actor in actors:
+            self.schedule(actor)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, actor: Actor) -> bool:
+        return actor in self._entries
+
+    def schedule(self, actor: Actor, delay: int = Action.base_cost) -> None:
+        """ (Re)schedule `actor` to act `delay` after the current time. """
+        self.remove(actor)
+        entry = [self.time + delay, self._order, actor]
+        self._order += 1
+        self._entries[actor] = entry
+        heapq.heappush(self._queue, entry)
+
+    def remove(self, actor: Actor) -> None:
+        """ Take `actor` out of the queue. Does nothing if it isn't scheduled. """
+        entry = self._entries.pop(actor, None)
+        if entry is None:
+            return
+        entry[2] = None
+        if len(self._queue) > 2 * len(self._entries) + 16:
+            # Mostly cancelled entries, rebuild instead of letting them pile up.
+            self._queue = [entry for entry in self._queue if entry[2] is not None]
+            heapq.heapify(self._queue)
+
+    def next_time(self) -> Optional[int]:
+        """ Return the time the next actor acts, or None if nobody is scheduled. """
+        while self._queue and self._queue[0][2] is None:
+            heapq.heappop(self._queue)
+        return self._queue[0][0] if self._queue else None
+
+    def pop_due(self, deadline: int) -> Optional[Actor]:
+        """
+        Pop the next actor due to act at or before `deadline` and move the clock to its time.
+
+        Returns None once no one else is due. The caller is expected to `schedule` the actor again after it acts.
+        """
+        time = self.next_time()
+        if time is None or time > deadline:
+            return None
+
+        _, _, actor = heapq.heappop(self._queue)
+        del self._entries[actor]
+        self.time = max(self.time, time)
+        return actor
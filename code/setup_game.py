@@ -26,6 +26,7 @@ from races import RACES
 from jobs import JOBS
 
 from config import tryeval
+from save_file import SAVES
 
 if TYPE_CHECKING:
     from races import BaseRace
@@ -76,8 +77,7 @@ def new_game(player: Actor) -> Engine:
 
 def load_game(filename: str) -> Engine:
     """ Load an Engine instance from a file. """
-    with open(f'data/user_data/{filename}', 'rb') as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
+    engine = SAVES.load(filename)
     assert isinstance(engine, Engine)
     engine.event_handler = input_handler.MainGameEventHandler(engine)
     return engine
@@ -88,7 +88,7 @@ class MainMenu(input_handler.EventHandler):
         super().__init__(engine)
         self.engine.wait = False
         self.selected_index = 0
-        if glob.glob("data\\user_data\\*.sav"):
+        if len(SAVES):
             self.selected_index = 1
 
     def on_render(self, console: tcod.console.Console) -> None:
@@ -154,10 +154,9 @@ class MainMenu(input_handler.EventHandler):
             
             case tcod.event.KeySym.c:
                 try:
-                    save_files = glob.glob("data\\user_data\\*.sav")
-                    if not save_files:
+                    latest_file = SAVES.latest()
+                    if latest_file is None:
                         raise FileNotFoundError()
-                    latest_file = max(save_files, key=os.path.getctime).replace('data\\user_data\\', '')
                     saved_engine = load_game(latest_file)
                     
                 except FileNotFoundError:
@@ -232,21 +231,7 @@ class CharacterCreatorHandler(input_handler.EventHandler):
         render_functions.draw_inner_border_detail(info_console)
         
         #info_console.print(x=info_console.width//2, y=2, string=self.sub_menus[5].answers[0], fg=self.sub_menus[5].answers[1])
-        tileset = tcod.tileset.load_tilesheet(
-            SETTINGS['tileset_file'], 16, 16, tcod.tileset.CHARMAP_CP437
-        )
-        tile = tileset.get_tile(ord(self.sub_menus[5].answers[0]))[:, :, 3:]
-        new_tile = np.zeros((10, 10, 3), dtype=np.uint8)
-        for i, row in enumerate(new_tile):
-            for j, col in enumerate(row):
-                for k, a in enumerate(col):
-                    if tile[i, j] == 255:
-                        new_tile[i, j, k] = self.sub_menus[5].answers[1][k]
-                    else:
-                        new_tile[i, j, k] = 0
-        
-        
-        img = tcod.image.Image.from_array(new_tile)
+        img = render_functions.glyph_image(self.sub_menus[5].answers[0], tuple(self.sub_menus[5].answers[1]), SETTINGS['tileset_file'])
         img.blit(info_console, x=info_console.width//2, y=6, bg_blend=1, scale_x=1, scale_y=1, angle=0)
         
         info_console.print(x=0, y=10, string=f'╠{"".join(["─"]*(info_console.width-2))}╣')
@@ -2,8 +2,10 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Tuple, TypeVar, Optional, Type
 
 from render_order import RenderOrder
+from fingerprint import Fingerprinted
+from prototypes import Prototyped
 
-import copy, math
+import math
 
 if TYPE_CHECKING:
     from ai import BaseAI
@@ -12,12 +14,15 @@ if TYPE_CHECKING:
     
 T = TypeVar("T", bound="Sprite")
 
-class Sprite():
+class Sprite(Prototyped, Fingerprinted):
     """
     A generic object to represent actor, items, etc.
     """
     
     parent: GameMap
+    fingerprint_exclude = ('parent', 'prototype_id', 'x', 'y', '_x', '_y')
+    prototype_shared = ('char', 'color')
+    prototype_parts = ('entity',)
     
     def __init__(
         self,
@@ -35,20 +40,74 @@ class Sprite():
 
         self.entity = entity
         self.char = char
-        self.x = x
-        self.y = y
+        self._x = x
+        self._y = y
         self.color = color
-        self.blocks_movement = blocks_movement
-        self.render_order = render_order
+        self._blocks_movement = blocks_movement
+        self._render_order = render_order
         self.pickupable = pickupable
-        self.blocks_fov = blocks_fov
+        self._blocks_fov = blocks_fov
         
         self.entity.parent = self
         
         if parent:
             # If parent isn't provided now then it will be set later.
             self.parent = parent
-            parent.sprites.add(self)
+            parent.add_sprite(self)
+    
+    # Position, blocking and render order setters keep the parent map's sprite index, components and blocking
+    # layers current.
+    @property
+    def x(self) -> int:
+        return self._x
+    @x.setter
+    def x(self, value: int) -> None:
+        self._x = value
+        self._notify_gamemap()
+        
+    @property
+    def y(self) -> int:
+        return self._y
+    @y.setter
+    def y(self, value: int) -> None:
+        self._y = value
+        self._notify_gamemap()
+        
+    @property
+    def blocks_movement(self) -> bool:
+        return self._blocks_movement
+    @blocks_movement.setter
+    def blocks_movement(self, value: bool) -> None:
+        self._blocks_movement = value
+        self._notify_gamemap()
+        
+    @property
+    def blocks_fov(self) -> bool:
+        return self._blocks_fov
+    @blocks_fov.setter
+    def blocks_fov(self, value: bool) -> None:
+        self._blocks_fov = value
+        self._notify_gamemap()
+        
+    @property
+    def render_order(self) -> RenderOrder:
+        return self._render_order
+    @render_order.setter
+    def render_order(self, value: RenderOrder) -> None:
+        self._render_order = value
+        self._notify_gamemap()
+        
+    def _notify_gamemap(self) -> None:
+        gamemap = self.__dict__.get('parent')
+        if gamemap is not None:
+            gamemap.sprite_changed(self)
+            
+    def __setstate__(self, state: dict) -> None:
+        # Saves from before these were properties store the plain attribute names.
+        for attr in ('x', 'y', 'blocks_movement', 'blocks_fov', 'render_order', 'ai'):
+            if attr in state:
+                state[f'_{attr}'] = state.pop(attr)
+        super().__setstate__(state)
             
     @property
     def gamemap(self) -> GameMap:
@@ -60,11 +119,11 @@ class Sprite():
         
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
-        clone.x = x
-        clone.y = y
+        clone = self.instantiate()
+        clone._x = x
+        clone._y = y
         clone.parent = gamemap
-        gamemap.sprites.add(clone)
+        gamemap.add_sprite(clone)
         return clone
     
     def place(self, x: int, y: int, gamemap: Optional[GameMap]) -> None:
@@ -72,11 +131,11 @@ class Sprite():
         self.x = x
         self.y = y
         if gamemap:
-            if hasattr(self, 'parent'): # Possibly uninitialized.
-                if self.parent is self.gamemap:
-                    self.gamemap.sprites.remove(self)
+            if getattr(self, 'parent', None) is not None: # Possibly uninitialized.
+                if self in self.gamemap.sprites:
+                    self.gamemap.remove_sprite(self)
             self.parent = gamemap
-            gamemap.sprites.add(self)
+            gamemap.add_sprite(self)
     
     def distance(self, x: int, y: int):
         """Return the distance between the current entity and the given (x, y) coordinate."""
@@ -91,20 +150,10 @@ class Sprite():
         return f'{self.char}({str(self.color)[1:-1]}): {self.entity.name}'
     def __repr__(self):
         return f'{self.__str__()}'
-    
-    def similar(self, other):
-        if isinstance(other, self.__class__):
-            for i, pair in enumerate(zip([_[1] for _ in vars(self).items() if _[0] != 'parent'], [_[1] for _ in vars(other).items() if _[0] != 'parent'])):
-                #print(list(self.__dict__.keys())[i])
-                #print(pair)
-                if hasattr(pair[0], 'similar') and not pair[0].similar(pair[1]):
-                    return False
-                elif not hasattr(pair[0], 'similar') and pair[0] != pair[1]:
-                    return False
-                
-            return True
 
 class Actor(Sprite):
+    fingerprint_exclude = Sprite.fingerprint_exclude + ('hostile',)
+    
     def __init__(
         self,
         character: Character,
@@ -130,12 +179,19 @@ class Actor(Sprite):
         self.entity: Character
         self.entity.parent = self
         
-        if ai_cls:
-            self.ai: Optional[BaseAI] = ai_cls(self)
+        self.ai = ai_cls(self) if ai_cls else None
         
         self.hostile = hostile
-
         
+    @property
+    def ai(self) -> Optional[BaseAI]:
+        return self._ai
+    @ai.setter
+    def ai(self, value: Optional[BaseAI]) -> None:
+        # Losing the AI is how an actor dies, so the map's components need to hear about it.
+        self._ai = value
+        self._notify_gamemap()
+
     @property
     def is_alive(self) -> bool:
         """Returns True as long as this actor can perform actions."""
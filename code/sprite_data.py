@@ -11,6 +11,8 @@ import item_data
 
 from ai import HostileEnemy
 
+from prototypes import PROTOTYPES
+
 dev_player = Actor(
     char='@',
     character=Character(
@@ -38,3 +40,5 @@ door = Sprite(
     blocks_fov=True,
     color=color.brown
 )
+
+PROTOTYPES.register('Door', door)
\ No newline at end of file
@@ -1,7 +1,9 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List, Optional, Dict
+from typing import TYPE_CHECKING, Hashable, List, Optional, Dict, Tuple
 
-import random, copy
+from functools import lru_cache
+
+import random
 import numpy as np
 
 from entity import Character, Item, Entity
@@ -11,10 +13,81 @@ from render_order import RenderOrder
 
 from ai import HostileEnemy
 
+from prototypes import PROTOTYPES
+
 if TYPE_CHECKING:
     from races import BaseRace
     from jobs import BaseJob
 
+class SpawnTable:
+    """
+    Weighted choices compiled into a cumulative weight array, so any number of picks is one numpy call.
+    
+    Get tables through `spawn_table`, which builds each distinct table once.
+    """
+    def __init__(self, weights: Dict[Hashable, float]) -> None:
+        self.choices: Tuple[Hashable, ...] = tuple(weights)
+        self.cumulative = np.cumsum(np.fromiter(weights.values(), dtype=np.float64, count=len(self.choices)))
+        if not self.choices or self.cumulative[-1] <= 0:
+            raise ValueError('Spawn table needs at least one choice with a positive weight.')
+        
+    def draw(self, k: int = 1) -> List[Hashable]:
+        """ Return `k` weighted picks. """
+        if k <= 0:
+            return []
+        # Seeded from `random` so seeding it still makes generation repeatable.
+        rng = np.random.default_rng(random.getrandbits(64))
+        picks = np.searchsorted(self.cumulative, rng.random(k) * self.cumulative[-1], side='right')
+        return [self.choices[i] for i in picks.tolist()]
+
+_spawn_tables: Dict[tuple, SpawnTable] = {}
+
+def spawn_table(base: Dict[Hashable, float], overrides: Optional[Dict[Hashable, float]] = None, overwrite: bool = False) -> SpawnTable:
+    """ Return the table for `base` weights with `overrides`. `overwrite` `True` uses only the overrides, `False` blends them. """
+    if overrides and overwrite:
+        weights = overrides
+    elif overrides:
+        weights = base | overrides
+    else:
+        weights = base
+    key = tuple(weights.items())
+    table = _spawn_tables.get(key)
+    if table is None:
+        table = _spawn_tables[key] = SpawnTable(weights)
+    return table
+
+@lru_cache(maxsize=None)
+def _races_by_name() -> Dict[str, BaseRace]:
+    from races import RACES
+    return {race.__class__.__name__: race for race in RACES}
+
+@lru_cache(maxsize=None)
+def _jobs_by_name() -> Dict[str, BaseJob]:
+    from jobs import JOBS
+    return {job.__class__.__name__: job for job in JOBS}
+
+@lru_cache(maxsize=None)
+def _base_weights(kind: str) -> Dict[str, int]:
+    if kind == 'races':
+        return {name: race.rarity for name, race in _races_by_name().items()}
+    if kind == 'jobs':
+        return {name: job.rarity for name, job in _jobs_by_name().items()}
+    if kind == 'levels':
+        return {1:15, 2:10, 3:5}
+    if kind == 'items':
+        from item_data import ITEMS
+        return {item.name: item.rarity for item in ITEMS}
+    raise KeyError(kind)
+
+def _draw_count(num: int | tuple) -> int:
+    # Convert int into list so random always is list
+    if isinstance(num, int):
+        num_range = [num,]*2
+    else:
+        num_range = list(num)
+    num_range[1] += 1
+    return random.randrange(*num_range)
+
 def gen_enemies(
     enemy_num: int | tuple,
     race_list: Optional[Dict[BaseRace, int]] = None,
@@ -25,60 +98,33 @@ def gen_enemies(
     level_overwrite: bool = True,
     ) -> List[Actor]:
     """ `overwrite` `True` overwrites default values, `False` blends values."""
-    from races import RACES
-    from jobs import JOBS
-    base_race_list = dict(zip([race.__class__.__name__ for race in RACES], [race.rarity for race in RACES]))
-    base_job_list = dict(zip([job.__class__.__name__ for job in JOBS], [job.rarity for job in JOBS]))
-    base_level_list = {1:15, 2:10, 3:5}
+    races, jobs = _races_by_name(), _jobs_by_name()
     
-    # Convert int into list so random always is list
+    num_enemies = _draw_count(enemy_num)
+    enemy_races = spawn_table(_base_weights('races'), race_list, race_overwrite).draw(num_enemies)
+    enemy_levels = spawn_table(_base_weights('levels'), level_list, level_overwrite).draw(num_enemies)
     
-    if isinstance(enemy_num, int):
-        enemy_num_range = [enemy_num,]*2
-    else:
-        enemy_num_range = list(enemy_num)
-    enemy_num_range[1] += 1
-    
-    if race_overwrite and race_list:
-        race_chance = race_list
-    elif race_list:
-        race_chance = base_race_list | race_list
-    else:
-        race_chance = base_race_list
-    race_chance, level_race_weights = zip(*race_chance.items())
-    
-    num_enemies = random.randrange(*enemy_num_range)
-    
-    enemy_races = random.choices(race_chance, level_race_weights, k=num_enemies)
-    
-    if level_overwrite and level_list:
-        level_chance = level_list
-    elif level_list:
-        level_chance = base_level_list | level_list
-    else:
-        level_chance = base_level_list
-    level_list, level_level_weights = zip(*level_chance.items())
-        
-    enemies: List[Character] = []
-    for enemy in enemy_races:
-        enemy_race = [i for i in RACES if i.__class__.__name__ == enemy][0]
-        
+    # Draw the jobs for each race in one go.
+    enemy_jobs: List[str] = [None] * num_enemies
+    for race_name in dict.fromkeys(enemy_races): # First seen order, set order would change the draws between runs.
+        indices = [i for i, name in enumerate(enemy_races) if name == race_name]
         if job_overwrite:
-            job_chance = job_list
+            job_table = spawn_table({}, job_list, overwrite=True)
         else:
-            job_chance = base_job_list | enemy_race.job_chance
-        job_key, level_job_weights = zip(*job_chance.items())
-        job_pick = random.choices(job_key, level_job_weights)[0]
-
-        enemy_job = [i for i in JOBS if i.__class__.__name__ == job_pick][0]
-        
+            job_table = spawn_table(_base_weights('jobs'), races[race_name].job_chance)
+        for i, job_name in zip(indices, job_table.draw(len(indices))):
+            enemy_jobs[i] = job_name
+    
+    enemies: List[Character] = []
+    for race_name, job_name, level in zip(enemy_races, enemy_jobs, enemy_levels):
+        enemy_race, enemy_job = races[race_name], jobs[job_name]
         enemies.append(Character(
                 name= f'{enemy_race.name} {enemy_job.name}',
                 corpse_value= enemy_race.default_corpse_val,
                 race= enemy_race,
                 gender= random.choice(['male', 'female']),
                 job= enemy_job,
-                level= random.choices(level_list, level_level_weights)[0],
+                level= level,
                 base_CON=8,
                 base_DEX=8,
                 base_STR=8
@@ -96,37 +142,11 @@ def gen_items(
     item_list: Optional[Dict[BaseRace, int]] = None,
     item_overwrite: bool = False,
 ) -> List[Sprite]:
-    from item_data import ITEMS
-    base_item_list = dict(zip([item.name for item in ITEMS], [item.rarity for item in ITEMS]))
-    
-    if isinstance(item_num, int):
-        item_num_range = [item_num,]*2
-    else:
-        item_num_range = list(item_num)
-    item_num_range[1] += 1
-    
-    if item_list and item_overwrite:
-        item_chance = item_list
-    elif item_list:
-        item_chance = base_item_list | item_list
-    else:
-        item_chance = base_item_list
-    
-    item_list, item_weights = zip(*item_chance.items())
-    
-    num_items = random.randrange(item_num_range[0], item_num_range[1])
-
-    item_choices:List[str] = random.choices(item_list, item_weights, k=num_items)
-    
-    items:List[Item] = []
-    for item in item_choices:
-        items.append(copy.deepcopy([i for i in ITEMS if i.name == item][0]))
-    
-    item_sprites = entity_to_sprite(items)
-    if not isinstance(item_sprites, list):
-        item_sprites = [item_sprites]
+    item_choices: List[str] = spawn_table(_base_weights('items'), item_list, item_overwrite).draw(_draw_count(item_num))
     
-    return item_sprites
+    # Spawned items come with a copy of their prototype's sprite.
+    items: List[Item] = [PROTOTYPES.spawn(item) for item in item_choices]
+    return [item.parent for item in items]
     
 
 def entity_to_sprite(entities: Entity | List[Entity]) -> Sprite | List[Sprite]:
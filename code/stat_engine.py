@@ -0,0 +1,89 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Iterable, List
+
+from operator import attrgetter, itemgetter
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from entity import Character
+
+ATTRIBUTES = ('CON', 'STR', 'END', 'DEX', 'FOC', 'INT', 'WIL', 'WGT', 'LCK')
+
+class BatchStats:
+    """
+    Derived stats for many characters at once.
+
+    Base attributes and the race/effect/equipment bonuses from each character's `StatBlock` are laid out as
+    (characters x stats) matrices, so `Character.update_stats` can be done for a whole floor in one numpy pass.
+    The formulas mirror `Character.update_stats` and must be kept in step with it.
+    """
+
+    def __init__(self, characters: Iterable[Character]) -> None:
+        self.characters: List[Character] = list(characters)
+        blocks = [character.stat_block for character in self.characters]
+
+        get_base = attrgetter(*(f'base_{attr}' for attr in ATTRIBUTES))
+        get_bonus = itemgetter(*ATTRIBUTES)
+        self.base = np.array(
+            [get_base(character) for character in self.characters], dtype=np.int64,
+        ).reshape(-1, len(ATTRIBUTES))
+        self.intrinsic = np.array(
+            [get_bonus(block.intrinsic) for block in blocks], dtype=np.int64,
+        ).reshape(-1, len(ATTRIBUTES))
+        self.extrinsic = np.array(
+            [get_bonus(block.extrinsic) for block in blocks], dtype=np.int64,
+        ).reshape(-1, len(ATTRIBUTES))
+        self.level = np.array([character.level for character in self.characters], dtype=np.int64)
+
+    @property
+    def attributes(self) -> np.ndarray:
+        """ Total attributes, one row per character, columns ordered like `ATTRIBUTES`. """
+        return self.base + self.intrinsic + self.extrinsic
+
+    def attribute(self, name: str) -> np.ndarray:
+        return self.attributes[:, ATTRIBUTES.index(name)]
+
+    def compute(self) -> Dict[str, np.ndarray]:
+        """ Return the stats `update_stats` derives, each as an array with one entry per character. """
+        attributes = self.attributes
+        CON, STR, END, DEX, FOC, INT, WIL, WGT, LCK = attributes.T
+
+        return {
+            'max_hp': ((CON*self.level)/1.5).astype(np.int64),
+            'max_mp': ((FOC*self.level)/1.5).astype(np.int64),
+            'max_sp': (END*self.level)//2,
+            'base_phys_atk': STR,
+            'base_magc_atk': INT,
+            'base_phys_defense': CON/10,
+            'base_phys_negation': np.zeros(len(self.characters), dtype=np.int64),
+            'base_magc_defense': FOC/10,
+            'base_magc_negation': np.zeros(len(self.characters), dtype=np.int64),
+            'base_dodge_chance': DEX *.01 + LCK *.001,
+        }
+
+    def apply(self) -> None:
+        """ Compute the derived stats and write them back, rescaling hp/mp/sp like `update_stats` does. """
+        if not self.characters:
+            return
+        stats = self.compute()
+
+        resources = ('hp', 'mp', 'sp')
+        current = np.array(
+            [[vars(character).get(f'_{resource}', 0) for resource in resources] for character in self.characters],
+            dtype=np.float64,
+        )
+        previous = np.array(
+            [[vars(character).get(f'max_{resource}', 0) for resource in resources] for character in self.characters],
+            dtype=np.float64,
+        )
+        # Characters without a previous maximum (just created, or zero) start full.
+        percent = np.divide(current, previous, out=np.ones_like(current), where=previous != 0)
+        for i, resource in enumerate(resources):
+            stats[f'_{resource}'] = (stats[f'max_{resource}'] * percent[:, i]).astype(np.int64)
+
+        names = list(stats) + ['stats_dirty']
+        rows = zip(*(values.tolist() for values in stats.values()))
+        for character, row in zip(self.characters, rows):
+            # None of these are properties, so the instance dicts can be written directly.
+            character.__dict__.update(zip(names, row + (False,)))
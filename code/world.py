@@ -1,21 +1,431 @@
 from __future__ import annotations
-from typing import Iterable, TYPE_CHECKING, Optional, Iterator, List
+from typing import Iterable, TYPE_CHECKING, Optional, Iterator, List, Tuple, Set
+
+import weakref
 
 import numpy as np # type: ignore
+import tcod
 from tcod.console import Console
 
 import color
 
 import tile_types
+from scheduler import TurnScheduler
 from sprite import Sprite, Actor
 from entity import Corpse, Item
 
 if TYPE_CHECKING:
     from engine import Engine
 
+_EMPTY_BUCKET: Set[Sprite] = frozenset()
+# Terrain glyphs an item can lie on without being drawn as a pile.
+_PILE_FREE_GLYPHS = np.array([ord(' '), ord('>'), ord('<')])
+
+class SpriteIndex:
+    """ Buckets sprites by the tile they stand on so location lookups don't scan every sprite on the map. """
+    
+    def __init__(self, sprites: Iterable[Sprite] = ()) -> None:
+        self._buckets: dict[Tuple[int, int], Set[Sprite]] = {}
+        self._locations: dict[Sprite, Tuple[int, int]] = {}
+        
+        for sprite in sprites:
+            self.add(sprite)
+            
+    def __len__(self) -> int:
+        return len(self._locations)
+    
+    def __contains__(self, sprite: Sprite) -> bool:
+        return sprite in self._locations
+            
+    def add(self, sprite: Sprite) -> None:
+        """ Add `sprite` at its current location. Re-buckets it if it is already indexed. """
+        self.remove(sprite)
+        location = (sprite.x, sprite.y)
+        self._buckets.setdefault(location, set()).add(sprite)
+        self._locations[sprite] = location
+        
+    def remove(self, sprite: Sprite) -> None:
+        """ Remove `sprite` from the index. Does nothing if it isn't indexed. """
+        location = self._locations.pop(sprite, None)
+        if location is None:
+            return
+        bucket = self._buckets[location]
+        bucket.discard(sprite)
+        if not bucket:
+            del self._buckets[location]
+            
+    def update(self, sprite: Sprite) -> None:
+        """ Move an indexed sprite to the bucket for its current location. """
+        location = self._locations.get(sprite)
+        if location is None or location == (sprite.x, sprite.y):
+            return
+        self.add(sprite)
+        
+    def at(self, x: int, y: int) -> Set[Sprite]:
+        """ Return the sprites on tile (`x`, `y`). The returned set must not be modified. """
+        return self._buckets.get((x, y), _EMPTY_BUCKET)
+    
+    def in_rect(self, x1: int, y1: int, x2: int, y2: int) -> Iterator[Sprite]:
+        """ Iterate the sprites inside the rectangle from (`x1`, `y1`) to (`x2`, `y2`), inclusive. """
+        if (x2 - x1 + 1) * (y2 - y1 + 1) > len(self._buckets):
+            # Fewer occupied tiles than tiles in the rectangle, so check the buckets instead.
+            for (x, y), bucket in self._buckets.items():
+                if x1 <= x <= x2 and y1 <= y <= y2:
+                    yield from bucket
+            return
+        
+        for x in range(x1, x2+1):
+            for y in range(y1, y2+1):
+                bucket = self._buckets.get((x, y))
+                if bucket:
+                    yield from bucket
+                    
+    def in_radius(self, x: int, y: int, radius: float) -> Iterator[Sprite]:
+        """ Iterate the sprites within euclidean distance `radius` of (`x`, `y`). """
+        reach = int(radius)
+        for sprite in self.in_rect(x-reach, y-reach, x+reach, y+reach):
+            if (sprite.x-x)**2 + (sprite.y-y)**2 <= radius**2:
+                yield sprite
+
+class BlockingLayers:
+    """
+    Persistent movement and FOV blocking arrays for a GameMap.
+    
+    Tile walkability/transparency is combined with whatever the sprites on the map block. The arrays are only
+    touched when a blocking sprite moves, toggles `blocks_movement`/`blocks_fov`, or is added or removed.
+    """
+    
+    def __init__(self, tiles: np.ndarray, sprites: Iterable[Sprite] = ()) -> None:
+        self.tiles = tiles
+        
+        self.movement_blocked = ~tiles['walkable']
+        self.fov_blocked = ~tiles['transparent']
+        self.transparent = tiles['transparent'].copy(order='F')
+        # Pathing cost: 0 is impassable, blocking sprites add 10 so actors path around each other.
+        self.cost = np.array(tiles['walkable'], dtype=np.int8, order='F')
+        
+        self._movement_blockers = np.zeros(tiles.shape, dtype=np.int16, order='F')
+        self._fov_blockers = np.zeros(tiles.shape, dtype=np.int16, order='F')
+        self._stamps: dict[Sprite, Tuple[int, int, bool, bool]] = {}
+        
+        # Bumped on every change so consumers can tell when cached results are stale.
+        self.movement_version = 0
+        self.fov_version = 0
+        
+        for sprite in sprites:
+            self.update(sprite)
+            
+    def update(self, sprite: Sprite) -> None:
+        """ Restamp `sprite` using its current location and blocking flags. """
+        stamp = (sprite.x, sprite.y, bool(sprite.blocks_movement), bool(sprite.blocks_fov))
+        old_stamp = self._stamps.get(sprite)
+        if stamp == old_stamp:
+            return
+        if old_stamp is not None:
+            self._stamp(*old_stamp, -1)
+        if stamp[2] or stamp[3]:
+            self._stamps[sprite] = stamp
+            self._stamp(*stamp, 1)
+        else:
+            self._stamps.pop(sprite, None)
+            
+    def remove(self, sprite: Sprite) -> None:
+        old_stamp = self._stamps.pop(sprite, None)
+        if old_stamp is not None:
+            self._stamp(*old_stamp, -1)
+    
+    def _stamp(self, x: int, y: int, blocks_movement: bool, blocks_fov: bool, amount: int) -> None:
+        if blocks_movement:
+            self._movement_blockers[x, y] += amount
+            self.movement_blocked[x, y] = not self.tiles['walkable'][x, y] or self._movement_blockers[x, y] > 0
+            if self.tiles['walkable'][x, y]:
+                self.cost[x, y] += 10 * amount
+            self.movement_version += 1
+        if blocks_fov:
+            self._fov_blockers[x, y] += amount
+            self.fov_blocked[x, y] = not self.tiles['transparent'][x, y] or self._fov_blockers[x, y] > 0
+            self.transparent[x, y] = not self.fov_blocked[x, y]
+            self.fov_version += 1
+
+class ComponentStore:
+    """
+    Struct-of-arrays copy of the sprites on a GameMap.
+    
+    Each sprite gets an integer id, its row in the column arrays. Sprites stay the source of truth (they move
+    between maps and into inventories), the store mirrors them so systems can query all of them at once with
+    numpy instead of walking Python objects. Rows of removed sprites are reused.
+    """
+    
+    def __init__(self, sprites: Iterable[Sprite] = (), capacity: int = 64) -> None:
+        self.ids: dict[Sprite, int] = {}
+        self.rows: List[Optional[Sprite]] = [None] * capacity
+        self._free: List[int] = list(range(capacity-1, -1, -1))
+        
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.blocks_movement = np.zeros(capacity, dtype=bool)
+        self.blocks_fov = np.zeros(capacity, dtype=bool)
+        self.render_order = np.zeros(capacity, dtype=np.int8)
+        self.is_actor = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.is_item = np.zeros(capacity, dtype=bool)
+        self.in_use = np.zeros(capacity, dtype=bool)
+        
+        for sprite in sprites:
+            self.add(sprite)
+            
+    _columns = ('x', 'y', 'blocks_movement', 'blocks_fov', 'render_order', 'is_actor', 'alive', 'is_item', 'in_use')
+            
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __contains__(self, sprite: Sprite) -> bool:
+        return sprite in self.ids
+    
+    def _grow(self) -> None:
+        capacity = len(self.rows)
+        for column in self._columns:
+            old = getattr(self, column)
+            new = np.zeros(capacity * 2, dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, column, new)
+        self.rows.extend([None] * capacity)
+        self._free.extend(range(capacity*2 - 1, capacity - 1, -1))
+        
+    def add(self, sprite: Sprite) -> int:
+        """ Give `sprite` a row and return its id. Returns the existing id if it already has one. """
+        sprite_id = self.ids.get(sprite)
+        if sprite_id is None:
+            if not self._free:
+                self._grow()
+            sprite_id = self._free.pop()
+            self.ids[sprite] = sprite_id
+            self.rows[sprite_id] = sprite
+            self.in_use[sprite_id] = True
+        self._write(sprite_id, sprite)
+        return sprite_id
+    
+    def remove(self, sprite: Sprite) -> None:
+        """ Free `sprite`'s row. Does nothing if it doesn't have one. """
+        sprite_id = self.ids.pop(sprite, None)
+        if sprite_id is None:
+            return
+        self.rows[sprite_id] = None
+        for column in self._columns:
+            getattr(self, column)[sprite_id] = 0
+        self._free.append(sprite_id)
+        
+    def update(self, sprite: Sprite) -> None:
+        """ Copy `sprite`'s current state into its row, if it has one. """
+        sprite_id = self.ids.get(sprite)
+        if sprite_id is not None:
+            self._write(sprite_id, sprite)
+    
+    def _write(self, sprite_id: int, sprite: Sprite) -> None:
+        self.x[sprite_id] = sprite.x
+        self.y[sprite_id] = sprite.y
+        self.blocks_movement[sprite_id] = sprite.blocks_movement
+        self.blocks_fov[sprite_id] = sprite.blocks_fov
+        self.render_order[sprite_id] = sprite.render_order.value
+        self.is_actor[sprite_id] = isinstance(sprite, Actor)
+        self.alive[sprite_id] = isinstance(sprite, Actor) and sprite.is_alive
+        self.is_item[sprite_id] = isinstance(sprite.entity, Item)
+        
+    def sprites(self, ids: Iterable[int]) -> List[Sprite]:
+        """ Return the sprites for the given ids. """
+        return [self.rows[sprite_id] for sprite_id in ids]
+    
+    def in_radius(self, x: int, y: int, radius: float, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """ Return the ids within euclidean distance `radius` of (`x`, `y`), optionally limited to `mask`. """
+        near = self.in_use & ((self.x - x)**2 + (self.y - y)**2 <= radius**2)
+        if mask is not None:
+            near &= mask
+        return np.flatnonzero(near)
+
+class FlowField:
+    """
+    Dijkstra distance map rooted at a single tile, shared by every actor heading towards it.
+    
+    Costs come from the map's `path_cost`, so tiles held by other actors are more expensive and crowds spread
+    out around the root. The map is only recomputed by `refresh` when the root moves or the movement layer
+    changed since the last refresh.
+    """
+    
+    directions = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+    
+    def __init__(self, gamemap: GameMap) -> None:
+        self.gamemap = gamemap
+        self.root: Optional[Tuple[int, int]] = None
+        self.distance: Optional[np.ndarray] = None
+        self._movement_version = -1
+        
+    def refresh(self, x: int, y: int) -> bool:
+        """ Root the field at (`x`, `y`). Returns True if the distances had to be recomputed. """
+        if self.root == (x, y) and self._movement_version == self.gamemap.movement_version:
+            return False
+        
+        distance = tcod.path.maxarray((self.gamemap.width, self.gamemap.height), dtype=np.int32, order='F')
+        distance[x, y] = 0
+        tcod.path.dijkstra2d(distance, self.gamemap.path_cost, 2, 3, out=distance)
+        
+        self.distance = distance
+        self.root = (x, y)
+        self._movement_version = self.gamemap.movement_version
+        return True
+    
+    def reachable(self, x: int, y: int) -> bool:
+        return self.distance is not None and self.distance[x, y] != np.iinfo(np.int32).max
+        
+    def next_step(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        """
+        Return the open neighbouring tile that is closest to the root, or None if no neighbour gets closer.
+        
+        Blocking is checked against the live movement layer, so actors that moved since the last refresh are
+        still walked around.
+        """
+        if not self.reachable(x, y):
+            return None
+        
+        best_step = None
+        best_distance = self.distance[x, y]
+        for dx, dy in self.directions:
+            step_x, step_y = x + dx, y + dy
+            if not self.gamemap.in_bounds(step_x, step_y) or self.gamemap.movement_blocked[step_x, step_y]:
+                continue
+            if self.distance[step_x, step_y] < best_distance:
+                best_step = step_x, step_y
+                best_distance = self.distance[step_x, step_y]
+        return best_step
+
+class SpriteMemory:
+    """
+    What the player remembers seeing on each tile, drawn where the tile is out of view.
+    
+    Per tile layers hold the remembered glyph, colour, turn seen and the ID of the sprite it came from. Sprites are
+    only weakly referenced, keyed by ID, so a forgotten or freed sprite is dropped instead of kept alive.
+    """
+    
+    def __init__(self, width: int, height: int) -> None:
+        self.owner = np.full((width, height), -1, dtype=np.int64, order='F') # Sprite ID, -1 if nothing remembered
+        self.glyph = np.zeros((width, height), dtype=np.int32, order='F')
+        self.fg = np.zeros((width, height, 3), dtype=np.uint8, order='F')
+        self.seen = np.zeros((width, height), dtype=np.int64, order='F')
+        
+        # Sprite ID -> (weak reference, remembered x, remembered y)
+        self._sprites: dict[int, Tuple[weakref.ref, int, int]] = {}
+        
+    def __len__(self) -> int:
+        return len(self._sprites)
+    
+    def remember(
+        self, sprite: Sprite, char: str, fg: Tuple[int, int, int], turn: int, x: Optional[int] = None, y: Optional[int] = None,
+    ) -> None:
+        """ Remember `sprite` drawn as `char` in `fg` on tile (`x`, `y`) at `turn`. Defaults to its current tile. """
+        if x is None or y is None:
+            x, y = sprite.x, sprite.y
+        key = self._track(sprite, x, y)
+        self.owner[x, y] = key
+        self.glyph[x, y] = ord(char)
+        self.fg[x, y] = fg
+        self.seen[x, y] = turn
+        
+    def remember_tiles(
+        self, sprites: List[Sprite], x: np.ndarray, y: np.ndarray, glyph: np.ndarray, fg: np.ndarray, turn: int,
+    ) -> None:
+        """ `remember` for many sprites at once, one per tile. `glyph` holds character codes. """
+        keys = []
+        for sprite, sprite_x, sprite_y in zip(sprites, x.tolist(), y.tolist()):
+            key = id(sprite)
+            entry = self._sprites.get(key)
+            if entry is None or entry[1] != sprite_x or entry[2] != sprite_y:
+                self._track(sprite, sprite_x, sprite_y)
+            keys.append(key)
+        self.owner[x, y] = keys
+        self.glyph[x, y] = glyph
+        self.fg[x, y] = fg
+        self.seen[x, y] = turn
+        
+    def _track(self, sprite: Sprite, x: int, y: int) -> int:
+        """ Record `sprite` as remembered on (`x`, `y`), clearing the tile it was remembered on before. """
+        key = id(sprite)
+        entry = self._sprites.get(key)
+        if entry is None:
+            ref = weakref.ref(sprite, lambda _, key=key: self._drop(key))
+        else:
+            ref, old_x, old_y = entry
+            if (old_x, old_y) != (x, y) and self.owner[old_x, old_y] == key:
+                self.owner[old_x, old_y] = -1
+        self._sprites[key] = ref, x, y
+        return key
+        
+    def _drop(self, key: int) -> None:
+        entry = self._sprites.pop(key, None)
+        if entry is not None and self.owner[entry[1], entry[2]] == key:
+            self.owner[entry[1], entry[2]] = -1
+            
+    def forget_before(self, turn: int) -> None:
+        """ Forget everything last seen before `turn`. """
+        expired = (self.owner != -1) & (self.seen < turn)
+        if not expired.any():
+            return
+        for key in np.unique(self.owner[expired]).tolist():
+            self._sprites.pop(key, None)
+        self.owner[expired] = -1
+        
+    def render(self, console: Console, hidden: np.ndarray, present: Set[Sprite]) -> None:
+        """ Draw remembered sprites that are still in `present` on the tiles where `hidden` is True. """
+        shown = []
+        for key, (ref, x, y) in list(self._sprites.items()):
+            if self.owner[x, y] != key:
+                del self._sprites[key] # Something else was remembered over it.
+            elif ref() in present:
+                shown.append((x, y))
+        if not shown:
+            return
+        
+        x, y = np.array(shown).T
+        keep = hidden[x, y]
+        x, y = x[keep], y[keep]
+        console.rgb['ch'][x, y] = self.glyph[x, y]
+        console.rgb['fg'][x, y] = self.fg[x, y]
+        
+    def __getstate__(self) -> dict:
+        # Weak references can't be pickled, and most tiles hold nothing, so only save the sprites still around
+        # with what is remembered on their tile.
+        remembered = []
+        for key, (ref, x, y) in self._sprites.items():
+            sprite = ref()
+            if sprite is not None and self.owner[x, y] == key:
+                remembered.append((sprite, x, y, int(self.glyph[x, y]), tuple(self.fg[x, y].tolist()), int(self.seen[x, y])))
+        return {'shape': self.owner.shape, 'remembered': remembered}
+    
+    def __setstate__(self, state: dict) -> None:
+        if 'owner' in state:
+            # Older saves kept the full layers.
+            sprites = state.pop('_sprites')
+            self.__dict__.update(state)
+            self._sprites = {}
+            owner = self.owner.copy()
+            self.owner[:] = -1
+            for old_key, sprite, x, y in sprites:
+                key = id(sprite)
+                self.owner[owner == old_key] = key
+                self._sprites[key] = weakref.ref(sprite, lambda _, key=key: self._drop(key)), x, y
+            return
+        self.__init__(*state['shape'])
+        for sprite, x, y, glyph, fg, seen in state['remembered']:
+            self.remember(sprite, chr(glyph), fg, seen, x, y)
+        
 class GameMap:
     game_world: GameWorld
     
+    # Bumped whenever the tiles themselves change or a door opens or closes. Unlike `movement_version` it ignores
+    # sprites moving around.
+    walkable_version = 0
+    # This floor pickled by the last save while the player was elsewhere. Dropped as soon as a sprite is added to,
+    # removed from or changed on the floor, which includes the player coming back.
+    save_payload: Optional[bytes] = None
+    
     def __init__(
         self, engine: Engine, width: int, height: int, floor_level: int = 0, sprites: Iterable[Sprite] = ()
     ) -> None:
@@ -23,10 +433,15 @@ class GameMap:
         self.width, self.height = width, height
         self.tiles = np.full((width, height), fill_value=tile_types.wall, order='F')
         self.sprites = set(sprites)
+        self._sprite_index: Optional[SpriteIndex] = None
+        self._layers: Optional[BlockingLayers] = None
+        self._player_field: Optional[FlowField] = None
+        self._components: Optional[ComponentStore] = None
+        self._scheduler: Optional[TurnScheduler] = None
         
         self.floor_level = floor_level
         
-        self.remembered_sprites: list[list[str | tuple | int | int | Sprite]] = []
+        self.sprite_memory = SpriteMemory(width, height)
         
         self.visible = np.full(
             (width, height), fill_value=False, order='F'
@@ -41,10 +456,8 @@ class GameMap:
     @property
     def actors(self) -> Iterator[Actor]:
         """ Iterate over this maps living actors. """
-        yield from (
-            sprite for sprite in self.sprites
-            if isinstance(sprite, Actor) and sprite.is_alive
-        )
+        components = self.components
+        yield from components.sprites(np.flatnonzero(components.alive))
         
     @property
     def items(self) -> Iterator[Sprite]:
@@ -53,44 +466,192 @@ class GameMap:
             if isinstance(sprite.entity, Item)
         )
         
+    @property
+    def sprite_index(self) -> SpriteIndex:
+        """ Tile to sprites index. Built on first use, then kept current by the add/remove/move paths. """
+        if self._sprite_index is None:
+            self._sprite_index = SpriteIndex(self.sprites)
+        return self._sprite_index
+    
+    @property
+    def components(self) -> ComponentStore:
+        """ Struct-of-arrays mirror of this map's sprites. Built on first use, then kept current like the index. """
+        if self._components is None:
+            self._components = ComponentStore(self.sprites, capacity=max(64, len(self.sprites)))
+        return self._components
+    
+    @property
+    def scheduler(self) -> TurnScheduler:
+        """ When each NPC on this map acts next. Built on first use and saved with the map. """
+        if self._scheduler is None:
+            self._scheduler = TurnScheduler(actor for actor in self.actors if actor is not self.engine.player)
+        return self._scheduler
+    
+    @property
+    def layers(self) -> BlockingLayers:
+        """ Movement/FOV blocking layers. Built on first use, then kept current by the add/remove/move paths. """
+        if self._layers is None:
+            self._layers = BlockingLayers(self.tiles, self.sprites)
+        return self._layers
+    
+    @property
+    def movement_blocked(self) -> np.ndarray:
+        """ True where a tile is unwalkable or has a sprite that blocks movement. Do not modify. """
+        return self.layers.movement_blocked
+    
+    @property
+    def fov_blocked(self) -> np.ndarray:
+        """ True where a tile is opaque or has a sprite that blocks FOV. Do not modify. """
+        return self.layers.fov_blocked
+    
+    @property
+    def transparent(self) -> np.ndarray:
+        """ Inverse of `fov_blocked`, ready to pass to `compute_fov`. Do not modify. """
+        return self.layers.transparent
+    
+    @property
+    def path_cost(self) -> np.ndarray:
+        """ Pathfinding cost array with blocking sprites weighted. Do not modify. """
+        return self.layers.cost
+    
+    @property
+    def movement_version(self) -> int:
+        """ Changes whenever `movement_blocked` or `path_cost` change. """
+        return self.layers.movement_version
+    
+    @property
+    def player_field(self) -> FlowField:
+        """ Distance field towards the player, refreshed once per turn by the engine. """
+        if self._player_field is None:
+            self._player_field = FlowField(self)
+        return self._player_field
+    
+    def refresh_layers(self) -> None:
+        """ Drop the blocking layers so they are rebuilt. Call after editing `tiles`. """
+        self._layers = None
+        self._player_field = None
+        self.walkable_version += 1
+    
+    def add_sprite(self, sprite: Sprite) -> None:
+        """ Add `sprite` to this map at its current location. """
+        self.save_payload = None
+        self.sprites.add(sprite)
+        if self._sprite_index is not None:
+            self._sprite_index.add(sprite)
+        if self._components is not None:
+            self._components.add(sprite)
+        if self._layers is not None:
+            self._layers.update(sprite)
+        if (
+            self._scheduler is not None and isinstance(sprite, Actor) and sprite.is_alive
+            and sprite is not self.engine.player
+        ):
+            self._scheduler.schedule(sprite)
+            
+    def remove_sprite(self, sprite: Sprite) -> None:
+        """ Remove `sprite` from this map and clear its `parent`. Raises `KeyError` if it isn't on this map. """
+        self.sprites.remove(sprite)
+        sprite.parent = None # Otherwise picked up items keep referring to this floor, in saves too.
+        self.save_payload = None
+        if self._sprite_index is not None:
+            self._sprite_index.remove(sprite)
+        if self._components is not None:
+            self._components.remove(sprite)
+        if self._layers is not None:
+            self._layers.remove(sprite)
+        if self._scheduler is not None:
+            self._scheduler.remove(sprite)
+            
+    def sprite_changed(self, sprite: Sprite) -> None:
+        """ Called by `Sprite` whenever its position, blocking flags, render order or AI change. """
+        if sprite not in self.sprites:
+            return
+        self.save_payload = None
+        if self._sprite_index is not None:
+            self._sprite_index.update(sprite)
+        if self._components is not None:
+            self._components.update(sprite)
+        if self._layers is not None:
+            self._layers.update(sprite)
+        if self._scheduler is not None and isinstance(sprite, Actor) and not sprite.is_alive:
+            self._scheduler.remove(sprite)
+    
+    def get_sprites_at_location(self, x: int, y: int) -> Set[Sprite]:
+        return self.sprite_index.at(x, y)
+    
+    def get_sprites_in_rect(self, x1: int, y1: int, x2: int, y2: int) -> List[Sprite]:
+        return list(self.sprite_index.in_rect(x1, y1, x2, y2))
+    
+    def get_sprites_in_range(self, x: int, y: int, radius: float) -> List[Sprite]:
+        return list(self.sprite_index.in_radius(x, y, radius))
+        
     def get_blocking_sprite_at_location(
         self, location_x: int, location_y: int
     ) -> Optional[Sprite]:
-        for sprite in self.sprites:
-            if (
-                sprite.blocks_movement
-                and sprite.x == location_x
-                and sprite.y == location_y
-            ):
+        for sprite in self.sprite_index.at(location_x, location_y):
+            if sprite.blocks_movement:
                 return sprite
 
         return None
     
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y and not isinstance(actor.entity, Corpse):
+        for actor in self.sprite_index.at(x, y):
+            if isinstance(actor, Actor) and actor.is_alive and not isinstance(actor.entity, Corpse):
                 return actor
         
         return None
     
     def get_sprite_at_location(self, x: int, y: int, exclude: set[Sprite] = set()) -> Optional[Sprite]:
-        for sprite in self.sprites - exclude:
-            if sprite.x == x and sprite.y == y:
+        for sprite in self.sprite_index.at(x, y):
+            if sprite not in exclude:
                 return sprite
         
         return None
     
     def get_actors_in_range(self, x: int, y: int, radius: int) -> List[Actor]:
-        actors_in_range: List[Actor] = []
-        for actor in self.actors:
-            if actor.distance(x, y) <= radius:
-                actors_in_range.append(actor)
-        return actors_in_range
+        components = self.components
+        return components.sprites(components.in_radius(x, y, radius, mask=components.alive))
         
     def in_bounds(self, x: int, y:int) -> bool:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
     
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # The index, components, layers and fields are rebuilt on first use after loading.
+        state['_sprite_index'] = None
+        state['_layers'] = None
+        state['_player_field'] = None
+        state['_components'] = None
+        state.pop('save_payload', None)
+        # A map only uses a handful of tile types, so save each once and an index per tile. Bool arrays as bits.
+        palette, index = np.unique(self.tiles.reshape(-1, order='F').view(f'V{self.tiles.itemsize}'), return_inverse=True)
+        state['tiles'] = palette.view(self.tiles.dtype), index.astype(np.min_scalar_type(len(palette)-1))
+        state['visible'] = np.packbits(self.visible, axis=None)
+        state['explored'] = np.packbits(self.explored, axis=None)
+        return state
+    
+    def __setstate__(self, state: dict) -> None:
+        shape = state['width'], state['height']
+        if isinstance(state['tiles'], tuple):
+            palette, index = state['tiles']
+            state['tiles'] = palette[index].reshape(shape, order='F')
+        for name in ('visible', 'explored'):
+            if state[name].dtype != bool:
+                state[name] = np.unpackbits(state[name], count=shape[0]*shape[1]).reshape(shape).astype(bool).copy(order='F')
+        state['_sprite_index'] = None
+        state['_layers'] = None
+        state['_player_field'] = None
+        state['_components'] = None
+        state.setdefault('_scheduler', None)
+        remembered_sprites = state.pop('remembered_sprites', None)
+        self.__dict__.update(state)
+        if remembered_sprites is not None:
+            # Older saves kept a list of [char, x, y, turn seen, sprite].
+            self.sprite_memory = SpriteMemory(self.width, self.height)
+            for char, x, y, turn, sprite in remembered_sprites:
+                self.sprite_memory.remember(sprite, char, sprite.color, turn, x, y)
+    
     def render(self, console: Console) -> None:
         """
         Renders the map.
@@ -105,56 +666,55 @@ class GameMap:
             default=tile_types.SHROUD,
         )
         
-        sprites_sorted_for_rendering = sorted(
-            self.sprites, key=lambda x: x.render_order.value
-        )
+        self._composite_sprites(console)
+        
+        # Print sprite's in memory
+        self.sprite_memory.render(console, ~self.visible, self.sprites)
         
-        for sprite in sprites_sorted_for_rendering:
+        if not 'keen mind' in self.engine.player.entity.tags:
+            self.sprite_memory.forget_before(self.engine.turn_count - self.engine.player.entity.INT)
+                
+    def _composite_sprites(self, console: Console) -> None:
+        """ Draw the sprites in view straight into `console.rgb`, one glyph per tile, and remember them. """
+        components = self.components
+        shown = components.in_use.copy()
+        if not self.engine.wallhacks:
+            shown &= self.visible[components.x, components.y]
+        player_id = components.ids.get(self.engine.player)
+        if player_id is not None:
+            shown[player_id] = False
+        
+        ids = np.flatnonzero(shown)
+        if ids.size:
+            sprites = components.sprites(ids)
+            x, y = components.x[ids], components.y[ids]
+            glyph = np.fromiter((ord(sprite.char) for sprite in sprites), dtype=np.int32, count=ids.size)
+            fg = np.array([sprite.color for sprite in sprites], dtype=np.uint8).reshape(-1, 3)
+            tile = x.astype(np.int64) * self.height + y
             
-            if self.remembered_sprites:
-                _,_,_,_,sprites_remembered = zip(*self.remembered_sprites)
-            else:
-                sprites_remembered: list[Sprite] = []
-            sprites_remembered: list[Sprite]
+            # Sort by tile, then render order, the last sprite of each tile is the one drawn.
+            order = np.lexsort((ids, components.render_order[ids], tile))
+            sorted_tiles = tile[order]
+            top = order[np.append(sorted_tiles[1:] != sorted_tiles[:-1], True)]
             
-            # Only print sprite that are in the FOV
-            if self.visible[sprite.x, sprite.y] or self.engine.wallhacks:
-                # If multiple items are on the ground print a pile char #
-                if console.rgb[sprite.x, sprite.y][0] not in [ord(" "), ord(">"), ord("<"), ord(sprite.char)] and isinstance(sprite.entity, Item):
-                    console.print(
-                    x=sprite.x, y=sprite.y, string='#', fg=color.white
-                    )
-                else:
-                    console.print(
-                        x=sprite.x, y=sprite.y, string=sprite.char, fg=sprite.color
-                    )
-                
-                #Remember sprites seen
-                #if sprite has already been then update it's last seen turn
-                if not sprite in sprites_remembered and sprite != self.engine.player:
-                    self.remembered_sprites.append([sprite.char, sprite.x, sprite.y, self.engine.turn_count, sprite])
-                elif sprite != self.engine.player:
-                    self.remembered_sprites[sprites_remembered.index(sprite)] = [sprite.char, sprite.x, sprite.y, self.engine.turn_count, sprite]
+            # An item with other glyphs on its tile is drawn as a pile.
+            glyph_counts = np.zeros(self.width * self.height, dtype=np.int32)
+            np.add.at(glyph_counts, np.unique(tile << 21 | glyph) >> 21, 1) # Unicode fits in 21 bits.
+            terrain = console.rgb['ch'][x[top], y[top]]
+            pile = components.is_item[ids[top]] & (
+                (glyph_counts[tile[top]] > 1) | ~np.isin(terrain, _PILE_FREE_GLYPHS)
+            )
+            top_glyph = np.where(pile, ord('#'), glyph[top])
+            top_fg = np.where(pile[:, None], np.array(color.white, dtype=np.uint8), fg[top])
             
-            # Print sprite's in memory
-            elif sprite in sprites_remembered:
-                if self.visible[sprite.x, sprite.y]:
-                    continue
-                
-                remembered_sprite = self.remembered_sprites[sprites_remembered.index(sprite)]
-                if console.rgb[sprite.x, sprite.y][0] not in [ord(" "), ord(">"), ord("<")] and isinstance(sprite.entity, Item):
-                    console.print(
-                    x=sprite.x, y=sprite.y, string='#', fg=color.white
-                    )
-                else:
-                    console.print(
-                        x=remembered_sprite[1], y=remembered_sprite[2], string=remembered_sprite[0], fg=sprite.color
-                    )
-        
-        for remembered_sprite in self.remembered_sprites:
-            #print(self.engine.turn_count, remembered_sprite[3], self.engine.player.entity.INT//2)
-            if not 'keen mind' in self.engine.player.entity.tags and self.engine.turn_count-remembered_sprite[3] > self.engine.player.entity.INT:
-                self.remembered_sprites.remove(remembered_sprite)
+            console.rgb['ch'][x[top], y[top]] = top_glyph
+            console.rgb['fg'][x[top], y[top]] = top_fg
+            self.sprite_memory.remember_tiles([sprites[i] for i in top.tolist()], x[top], y[top], top_glyph, top_fg, self.engine.turn_count)
+        
+        player = self.engine.player
+        if player_id is not None and (self.visible[player.x, player.y] or self.engine.wallhacks):
+            console.rgb['ch'][player.x, player.y] = ord(player.char)
+            console.rgb['fg'][player.x, player.y] = player.color
                 
 class GameLocation:
     """ Holds the settings for the GameMap, and generates new maps when moving down the stairs. """
@@ -187,27 +747,35 @@ class GameLocation:
         
         self.current_floor = current_floor
         
+        # Floors a save left unloaded are `save_file.UnloadedFloor`s until `get_floor` loads them.
         self.maps: list[GameMap] = []
         
+    def get_floor(self, floor_level: int) -> Optional[GameMap]:
+        """ The map of `floor_level` if it was generated, loading it first if the save left it unloaded. """
+        for i, gmap in enumerate(self.maps):
+            if gmap.floor_level == floor_level:
+                if not isinstance(gmap, GameMap):
+                    gmap = self.maps[i] = gmap.load()
+                return gmap
+        return None
+        
     def go_up(self) -> None:
-        map_up = [gmap for gmap in self.maps if gmap.floor_level == self.current_floor-1]
-        if map_up:
+        map_up = self.get_floor(self.current_floor-1)
+        if map_up is not None:
             self.current_floor -= 1
-            self.engine.game_map = map_up[0]
-            self.engine.player.x, self.engine.player.y = self.engine.game_map.down_stairs_location
-            self.engine.game_map.sprites.add(self.engine.player)
+            self.engine.game_map = map_up
+            self.engine.player.place(*self.engine.game_map.down_stairs_location, self.engine.game_map)
             return True
         else:
             print('No map above.')
             return False
             
     def go_down(self, generate_floor: bool = True) -> None:
-        map_down = [gmap for gmap in self.maps if gmap.floor_level == self.current_floor+1]
-        if map_down:
+        map_down = self.get_floor(self.current_floor+1)
+        if map_down is not None:
             self.current_floor += 1
-            self.engine.game_map = map_down[0]
-            self.engine.player.x, self.engine.player.y = self.engine.game_map.up_stairs_location
-            self.engine.game_map.sprites.add(self.engine.player)
+            self.engine.game_map = map_down
+            self.engine.player.place(*self.engine.game_map.up_stairs_location, self.engine.game_map)
             return True
         elif generate_floor:
             self.current_floor += 1
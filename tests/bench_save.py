@@ -0,0 +1,48 @@
+""" Times saving and loading a 10 floor game and reports the uncompressed size of each kind of save section.
+
+Run from the repo root: PYTHONPATH=code python tests/bench_save.py """
+import io, os, random, tempfile, time
+
+import save_file
+import setup_game
+from sprite_data import dev_player
+
+def timed(label, func, repeat=10):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    print(f'{label:<40}{(time.perf_counter() - start) / repeat * 1000:8.3f} ms')
+    return result
+
+random.seed(0)
+engine = setup_game.new_game(dev_player)
+for _ in range(9):
+    engine.game_location.go_down()
+    engine.update_fov()
+    for _ in range(20):
+        engine.advance_turn()
+
+roots = save_file._split_sections(engine)
+names = {id(root): name for name, root in roots.items()}
+def payload(root) -> bytes:
+    buffer = io.BytesIO()
+    save_file._SectionPickler(buffer, names).dump(root.__getstate__())
+    return buffer.getvalue()
+
+sizes = {name: len(payload(root)) for name, root in roots.items()}
+floors = [size for name, size in sizes.items() if name.startswith('floor:')]
+print(f'{"engine, player, message log":<40}{sizes["engine"] + sizes["player"] + sizes["message_log"]:8} bytes')
+print(f'{"floor, average":<40}{sum(floors) // len(floors):8} bytes')
+print(f'{"total":<40}{sum(sizes.values()):8} bytes')
+timed('pickle sections', lambda: [payload(root) for root in roots.values()])
+
+path = os.path.join(tempfile.mkdtemp(), 'bench.sav')
+timed('save', lambda: save_file.write_save(path, engine))
+timed('background save, game thread part', lambda: save_file.SaveSnapshot(engine))
+print(f'{"file size":<40}{os.path.getsize(path):8} bytes')
+timed('load', lambda: save_file.read_save(path))
+def load_all():
+    loaded = save_file.read_save(path)
+    for level in range(1, 11):
+        loaded.game_location.get_floor(level)
+timed('load every floor', load_all)
@@ -0,0 +1,64 @@
+""" Times `Character.add_effect` and `inventory_as_stacks` with fingerprints against the old reflective `similar`.
+
+Run from the repo root: PYTHONPATH=code python tests/bench_similar.py """
+import copy, random, time
+
+import setup_game
+from sprite_data import dev_player
+from item_data import ITEMS
+from entity_effect import CharacterEffect
+
+def reflective_similar(self, other, exclude=('parent', 'holder', 'dead_character')) -> bool:
+    """ The attribute by attribute comparison `similar` used to do. """
+    if not isinstance(other, self.__class__):
+        return False
+    for a, b in zip(
+        [v for k, v in vars(self).items() if k not in exclude + self.fingerprint_transient],
+        [v for k, v in vars(other).items() if k not in exclude + other.fingerprint_transient],
+    ):
+        if hasattr(a, 'similar'):
+            if not reflective_similar(a, b):
+                return False
+        elif a != b:
+            return False
+    return True
+
+def timed(label, func, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    print(f'{label:<40}{(time.perf_counter() - start) / repeat * 1000:8.3f} ms')
+
+random.seed(0)
+engine = setup_game.new_game(dev_player)
+character = engine.player.entity
+
+effects = [CharacterEffect(attribute_bonuses={'STR': i % 25}, stackable=False) for i in range(200)]
+items = [copy.deepcopy(random.choice(ITEMS)) for _ in range(300)]
+
+def add_effects(similar):
+    character.effects = []
+    for effect in effects:
+        if not any(similar(e, effect) for e in character.effects):
+            character.effects.append(effect)
+
+def group(similar):
+    stacks = []
+    for item in items:
+        for stack in stacks:
+            if similar(item, stack[0]):
+                stack.append(item)
+                break
+        else:
+            stacks.append([item])
+    return stacks
+
+assert [len(s) for s in group(reflective_similar)] == [len(s) for s in group(lambda a, b: a.similar(b))]
+
+timed('add_effect, reflective', lambda: add_effects(reflective_similar))
+timed('add_effect, fingerprint', lambda: add_effects(lambda a, b: a.similar(b)))
+timed('stacking, reflective', lambda: group(reflective_similar))
+timed('stacking, fingerprint', lambda: group(lambda a, b: a.similar(b)))
+for item in items:
+    character.add_inventory(item, silent=True)
+timed('inventory_as_stacks, cached', lambda: character.inventory_as_stacks, repeat=200)
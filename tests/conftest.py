@@ -0,0 +1,23 @@
+""" Shared setup for the pytest tests. Run from anywhere with `python -m pytest tests`. """
+import os, random, sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'code'))
+os.chdir(ROOT) # settings.ini and the assets are read relative to the repo root.
+
+# Scratch scripts whose names pytest would otherwise collect.
+collect_ignore = ['test_magic.py', 'voronoi_test.py']
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """ A new game on a fixed seed, keeping saves and message history in `tmp_path`. """
+    import message_log, save_file, setup_game
+    from sprite_data import dev_player
+    monkeypatch.setattr(message_log.MessageLog, 'history_dir', str(tmp_path / 'message_history'))
+    monkeypatch.setattr(save_file.SAVES, 'directory', str(tmp_path / 'saves'))
+    save_file.SAVES.refresh(force=True)
+    random.seed(0)
+    return setup_game.new_game(dev_player)
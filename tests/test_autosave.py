@@ -0,0 +1,30 @@
+import save_file
+import setup_game
+from save_file import SAVES
+
+
+def test_autosave_slot_stays_the_same_across_load(engine):
+    name = engine.autosave_name
+    SAVES.save_in_background(name, engine).result()
+    loaded = setup_game.load_game(name)
+    assert loaded.autosave_name == name
+    
+    # Saving the loaded game again, manually or automatically, leaves a single autosave slot.
+    loaded.save_as('manual.sav')
+    reloaded = setup_game.load_game('manual.sav')
+    assert reloaded.autosave_name == name
+    SAVES.save_in_background(reloaded.autosave_name, reloaded).result()
+    assert SAVES.sorted('name') == sorted([name, 'manual.sav'], key=str.lower)
+    assert SAVES.latest('autosave_') == name
+
+
+def test_background_save_keeps_the_game_as_it_was(engine):
+    player = engine.player
+    position = player.x, player.y
+    future = SAVES.save_in_background(engine.autosave_name, engine)
+    player.place(player.x + 1, player.y, engine.game_map)
+    future.result()
+    
+    loaded = save_file.read_save(SAVES.path(engine.autosave_name))
+    assert (loaded.player.x, loaded.player.y) == position
+    assert not SAVES.failures()
@@ -0,0 +1,56 @@
+import pickle
+
+import tcod
+
+from prototypes import PROTOTYPES
+
+SLOT = tcod.event.KeySym.N1
+
+
+def slot_stack(character, item):
+    return next(stack for stack in character.inventory_as_stacks if any(i is item for i in stack))
+
+
+def test_slot_keeps_an_item_whose_stack_key_changed(engine):
+    character = engine.player.entity
+    favorites = character.favorites
+    sword = PROTOTYPES.spawn('Sword')
+    character.add_inventory(sword, silent=True)
+    favorites.add_fav(SLOT, slot_stack(character, sword))
+    
+    key = sword.stack_key
+    character.equip(sword, silent=True)
+    sword.effect.phys_atk_bonus += 1
+    assert sword.stack_key != key
+    
+    character.add_inventory(PROTOTYPES.spawn('Health Potion'), silent=True)
+    favorites.update()
+    assert favorites.items[SLOT] == [sword]
+
+
+def test_slot_refills_with_a_changed_item_of_its_kind(engine):
+    character = engine.player.entity
+    favorites = character.favorites
+    first = PROTOTYPES.spawn('Health Potion')
+    character.add_inventory(first, silent=True)
+    favorites.add_fav(SLOT, slot_stack(character, first))
+    for item in list(favorites.items[SLOT]):
+        character.drop_inventory(item, silent=True)
+    assert favorites.items[SLOT] is None
+    
+    changed = PROTOTYPES.spawn('Health Potion')
+    changed.effect.amount += 1
+    character.add_inventory(changed, silent=True)
+    assert favorites.items[SLOT] == [changed]
+
+
+def test_slots_saved_with_stack_keys_load(engine):
+    character = engine.player.entity
+    favorites = character.favorites
+    potion = PROTOTYPES.spawn('Health Potion')
+    character.add_inventory(potion, silent=True)
+    favorites.add_fav(SLOT, slot_stack(character, potion))
+    favorites._keys[SLOT] = potion.stack_key # What saves from before slots remembered kinds hold.
+    
+    loaded = pickle.loads(pickle.dumps(engine.player)).entity.favorites
+    assert loaded._keys[SLOT] == favorites._kind(potion)
@@ -0,0 +1,67 @@
+import os, pickle
+
+import pytest
+
+import color
+from message_log import Message, MessageLog
+
+
+@pytest.fixture(autouse=True)
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(MessageLog, 'history_dir', str(tmp_path))
+    return tmp_path
+
+
+def texts(log, start=0, stop=100):
+    return [message.plain_text for message in log.get_messages(start, stop)]
+
+
+def test_spilled_messages_are_written_in_batches(monkeypatch):
+    monkeypatch.setattr(MessageLog, 'spill_batch', 4)
+    log = MessageLog(capacity=2)
+    for i in range(5):
+        log.add_message(f'msg {i}')
+    assert not os.path.exists(log.history_file) # Three spilled, one short of a batch.
+    log.add_message('msg 5')
+    assert log.spilled == 4
+    assert texts(log) == [f'msg {i}' for i in range(6)]
+
+
+def test_saving_writes_the_pending_messages_and_loads_continue_apart():
+    log = MessageLog(capacity=2)
+    for i in range(5):
+        log.add_message(f'msg {i}')
+    loaded = pickle.loads(pickle.dumps(log))
+    assert loaded.spilled == 3
+    
+    log.add_message('later a')
+    loaded.add_message('later b')
+    log.flush()
+    loaded.flush()
+    assert texts(log)[-3:] == ['msg 3', 'msg 4', 'later a']
+    assert texts(loaded) == ['msg 0', 'msg 1', 'msg 2', 'msg 3', 'msg 4', 'later b']
+    assert log.history_file != loaded.history_file
+
+
+def test_clear_removes_a_history_file_no_save_refers_to(history_dir):
+    log = MessageLog(capacity=1)
+    for i in range(3):
+        log.add_message(f'msg {i}')
+    log.flush()
+    unsaved = log.history_file
+    log.clear()
+    assert not os.path.exists(unsaved) and len(log) == 0
+    
+    for i in range(3):
+        log.add_message(f'msg {i}')
+    pickle.dumps(log)
+    saved = log.history_file
+    log.clear()
+    assert os.path.exists(saved) and log.history_file != saved
+
+
+def test_logs_from_before_the_history_file_load():
+    old = MessageLog.__new__(MessageLog)
+    old.__setstate__({'messages': [Message(str(i), color.white) for i in range(1500)]})
+    assert len(old) == 1500
+    assert texts(old, 0, 1) == ['0'] and texts(old, 1499, 1500) == ['1499']
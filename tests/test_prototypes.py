@@ -0,0 +1,37 @@
+import pickle
+
+import pytest
+
+from prototypes import PROTOTYPES
+
+
+def test_changing_a_spawned_item_leaves_its_siblings_alone():
+    first, second = PROTOTYPES.spawn('Sword'), PROTOTYPES.spawn('Sword')
+    equippable = dict(second.equippable)
+    
+    first.own('tags').add('enchanted')
+    first.effect.own('attribute_bonuses')['STR'] += 1
+    first.own('equippable')['Head'] = not equippable['Head']
+    
+    for unchanged in (second, PROTOTYPES.get('Sword')):
+        assert 'enchanted' not in unchanged.tags
+        assert unchanged.effect.attribute_bonuses['STR'] == 0
+        assert unchanged.equippable == equippable
+    assert first.stack_key != second.stack_key
+
+
+def test_shared_values_cant_be_changed_in_place():
+    item = PROTOTYPES.spawn('Sword')
+    with pytest.raises(AttributeError):
+        item.tags.add('enchanted')
+    with pytest.raises(TypeError):
+        item.effect.attribute_bonuses['STR'] = 5
+    with pytest.raises(TypeError):
+        item.equippable.update({'Head': True})
+
+
+def test_spawned_items_still_stack_after_a_pickle():
+    item = PROTOTYPES.spawn('Sword')
+    loaded = pickle.loads(pickle.dumps(item))
+    assert loaded.tags is item.tags
+    assert loaded.stack_key == PROTOTYPES.spawn('Sword').stack_key
@@ -0,0 +1,78 @@
+import lzma, pickle
+
+import pytest
+
+import actions
+import save_file
+from world import GameMap
+
+
+@pytest.mark.parametrize('stale_parent', [False, True], ids=['current', 'older save'])
+def test_drop_item_picked_up_on_another_floor(engine, tmp_path, stale_parent):
+    # A held item used to keep the floor it was picked up on as its parent, which a load left as a placeholder.
+    player = engine.player
+    item = next(sprite for sprite in engine.game_map.items)
+    player.place(item.x, item.y, engine.game_map)
+    actions.PickupAction(player).perform()
+    assert item.entity in player.entity.inventory
+    assert item.parent is None
+    if stale_parent:
+        item.parent = engine.game_map # What saves written before remove_sprite cleared it hold.
+    
+    engine.game_location.go_down()
+    path = str(tmp_path / 'game.sav')
+    save_file.write_save(path, engine)
+    loaded = save_file.read_save(path)
+    
+    held = next(held for held in loaded.player.entity.inventory if held.name == item.name)
+    actions.DropItem(loaded.player, held).perform()
+    assert held.parent in loaded.game_map.sprites
+    assert held.parent.gamemap is loaded.game_map
+
+
+def floor_summary(gamemap):
+    return (
+        gamemap.floor_level, gamemap.tiles.tobytes(), gamemap.explored.tobytes(),
+        sorted((sprite.name, sprite.x, sprite.y) for sprite in gamemap.sprites),
+    )
+
+
+def test_round_trip_reproduces_every_floor(engine, tmp_path):
+    location = engine.game_location
+    location.go_down()
+    location.go_down()
+    location.go_up()
+    floors = [floor_summary(gamemap) for gamemap in location.maps]
+    
+    path = str(tmp_path / 'game.sav')
+    save_file.write_save(path, engine)
+    loaded = save_file.read_save(path)
+    
+    assert loaded.game_location.current_floor == location.current_floor
+    assert [isinstance(gamemap, save_file.UnloadedFloor) for gamemap in loaded.game_location.maps] == [True, False, True]
+    assert [floor_summary(loaded.game_location.get_floor(level)) for level, *_ in floors] == floors
+    assert (loaded.player.x, loaded.player.y) == (engine.player.x, engine.player.y)
+    assert loaded.player in loaded.game_map.sprites
+    assert [item.name for item in loaded.player.entity.inventory] == [item.name for item in engine.player.entity.inventory]
+
+
+def test_headerless_save_loads(engine, tmp_path, monkeypatch):
+    # Version 1 saves were the whole engine pickled and compressed, and kept floors' arrays as they are.
+    packed_state = GameMap.__getstate__
+    def full_state(gamemap):
+        state = packed_state(gamemap)
+        state['tiles'], state['visible'], state['explored'] = gamemap.tiles, gamemap.visible, gamemap.explored
+        return state
+    engine.game_location.go_down()
+    floors = [floor_summary(gamemap) for gamemap in engine.game_location.maps]
+    with monkeypatch.context() as patch:
+        patch.setattr(GameMap, '__getstate__', full_state)
+        data = lzma.compress(pickle.dumps(engine))
+    path = tmp_path / 'old.sav'
+    path.write_bytes(data)
+    
+    loaded = save_file.read_save(str(path))
+    assert [floor_summary(gamemap) for gamemap in loaded.game_location.maps] == floors
+    assert loaded.player.gamemap is loaded.game_map
+    header = save_file.read_header(str(path))
+    assert header['floor'] == engine.game_location.current_floor
@@ -0,0 +1,32 @@
+from collections import Counter
+
+import actions
+from scheduler import TurnScheduler
+
+
+def test_cheaper_actions_come_round_more_often():
+    scheduler = TurnScheduler(['fast', 'slow'])
+    costs = {'fast': 50, 'slow': 100}
+    acted = Counter()
+    while (actor := scheduler.pop_due(1000)) is not None:
+        acted[actor] += 1
+        scheduler.schedule(actor, costs[actor])
+    assert acted == {'fast': 19, 'slow': 10} # Both first act at 100, then every 50 or 100 up to 1000.
+
+
+def test_faster_actor_acts_more_often(engine, monkeypatch):
+    fast, slow = [actor for actor in engine.game_map.actors if actor is not engine.player][:2]
+    fast.entity.base_DEX, slow.entity.base_DEX = 30, 4
+    assert fast.entity.speed > 100 > slow.entity.speed
+    assert actions.WaitAction(fast).cost < actions.Action.base_cost < actions.WaitAction(slow).cost
+
+    acted = Counter()
+    def wait(ai):
+        acted[ai.sprite] += 1
+        ai.act(actions.WaitAction(ai.sprite))
+    for actor in (fast, slow):
+        monkeypatch.setattr(actor.ai, 'perform', wait.__get__(actor.ai))
+    for _ in range(20):
+        engine.handle_npc_turns()
+
+    assert acted[fast] > 20 > acted[slow]
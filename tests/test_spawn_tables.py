@@ -0,0 +1,47 @@
+import os, random, subprocess, sys
+
+import pytest
+
+from spritegen import SpawnTable, spawn_table
+
+
+def test_same_seed_draws_the_same():
+    table = SpawnTable({'rat': 10, 'goblin': 5, 'orc': 1})
+    random.seed(3)
+    first = table.draw(50)
+    random.seed(3)
+    assert table.draw(50) == first
+    assert set(first) <= {'rat', 'goblin', 'orc'}
+
+
+def test_draws_follow_the_weights():
+    random.seed(0)
+    picks = SpawnTable({'common': 9, 'rare': 1, 'never': 0}).draw(10000)
+    assert 'never' not in picks
+    assert 0.85 < picks.count('common') / len(picks) < 0.95
+
+
+def test_tables_are_built_once_per_weights():
+    base = {'a': 1, 'b': 2}
+    assert spawn_table(base) is spawn_table(dict(base))
+    assert spawn_table(base, {'b': 5}).cumulative.tolist() == [1, 6]
+    assert spawn_table(base, {'b': 5}, overwrite=True).choices == ('b',)
+    with pytest.raises(ValueError):
+        SpawnTable({'a': 0})
+
+
+GEN_ENEMIES = (
+    'import random, spritegen; random.seed(7); '
+    'print([(a.name, a.entity.level) for a in spritegen.gen_enemies(30)])'
+)
+
+def test_generated_enemies_dont_depend_on_hash_seed():
+    # Iterating a set of the drawn races used to reorder the job draws with the string hash seed.
+    code_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'code')
+    outputs = set()
+    for hash_seed in ('1', '2', '3'):
+        env = dict(os.environ, PYTHONHASHSEED=hash_seed, PYTHONPATH=code_dir)
+        outputs.add(subprocess.run(
+            [sys.executable, '-c', GEN_ENEMIES], env=env, capture_output=True, text=True, check=True
+        ).stdout)
+    assert len(outputs) == 1
@@ -0,0 +1,62 @@
+import pickle
+
+from fingerprint import Fingerprinted
+from prototypes import PROTOTYPES
+
+
+def old_similar(a, b) -> bool:
+    # The attribute by attribute comparison inventories used to stack with.
+    if not isinstance(b, type(a)):
+        return False
+    skip = a.fingerprint_exclude + a.fingerprint_transient + ('holder',)
+    mine = {name: value for name, value in vars(a).items() if name not in skip}
+    theirs = {name: value for name, value in vars(b).items() if name not in skip}
+    if mine.keys() != theirs.keys():
+        return False
+    for name, value in mine.items():
+        if isinstance(value, Fingerprinted):
+            if not old_similar(value, theirs[name]):
+                return False
+        elif value != theirs[name]:
+            return False
+    return True
+
+
+def old_stacks(items):
+    stacks = []
+    for item in items:
+        for stack in stacks:
+            if any(old_similar(item, other) for other in stack):
+                stack.append(item)
+                break
+        else:
+            stacks.append([item])
+    return stacks
+
+
+def test_stacks_match_pairwise_grouping(engine):
+    character = engine.player.entity
+    for item in list(character.inventory):
+        character.drop_inventory(item, silent=True)
+    
+    stronger = PROTOTYPES.spawn('Health Potion')
+    stronger.effect.amount += 1
+    renamed = PROTOTYPES.spawn('Sword')
+    renamed.name = 'Old Sword'
+    items = [
+        PROTOTYPES.spawn('Health Potion'), PROTOTYPES.spawn('Sword'), stronger, PROTOTYPES.spawn('Mana Potion'),
+        PROTOTYPES.spawn('Health Potion'), renamed, PROTOTYPES.spawn('Sword'),
+        pickle.loads(pickle.dumps(PROTOTYPES.spawn('Health Potion'))),
+    ]
+    for item in items:
+        character.add_inventory(item, silent=True)
+    
+    expected = [[id(item) for item in stack] for stack in old_stacks(items)]
+    assert [[id(item) for item in stack] for stack in character.inventory_as_stacks] == expected
+    assert len(expected) == 5
+    
+    # Changing an item after it was added regroups it.
+    items[4].effect.amount += 1
+    expected = [[id(item) for item in stack] for stack in old_stacks(items)]
+    assert [[id(item) for item in stack] for stack in character.inventory_as_stacks] == expected
+    assert [id(stronger), id(items[4])] in expected